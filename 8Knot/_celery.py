@@ -1,6 +1,11 @@
-from celery import Celery
+from celery import Celery, states
+from celery.signals import task_prerun, task_postrun, worker_process_shutdown
 from dash import CeleryManager
+from cache_manager.cache_manager import CacheManager, OWNER_TTL
+from db_manager.augur_manager import dispose_engines
 import os
+import logging
+import threading
 
 redis_host = "{}".format(os.getenv("REDIS_SERVICE_HOST", "redis-cache"))
 redis_port = "{}".format(os.getenv("REDIS_SERVICE_PORT", "6379"))
@@ -18,3 +23,68 @@ celery_app = Celery(
 celery_app.conf.update(task_time_limit=84600, task_acks_late=True, task_track_started=True)
 
 celery_manager = CeleryManager(celery_app=celery_app)
+
+
+# stops the ownership renewal of each running query task, by task ID.
+_renewals = {}
+
+
+@task_prerun.connect
+def renew_query_repos(sender=None, task_id=None, args=None, **kwargs):
+    """Renews a running query task's ownership of the repos it was
+    dispatched for every OWNER_TTL / 3 seconds, until it finishes.
+    If the worker dies the renewals stop, so the repos are re-dispatched
+    after at most OWNER_TTL seconds instead of waiting on a lost task.
+
+    The slices of a chord also renew the ownership of the chord's
+    stitching task, which owns the repo but only runs once they're done.
+    """
+    # query tasks are called with a list of repo_ids
+    if not args or not isinstance(args[0], list):
+        return
+
+    owners = [task_id]
+    chord = getattr(sender.request, "chord", None)
+    if chord:
+        owners.append(chord.get("options", {}).get("task_id"))
+
+    stop = threading.Event()
+    _renewals[task_id] = stop
+
+    def renew():
+        cm = CacheManager()
+        while not stop.wait(OWNER_TTL / 3):
+            try:
+                for owner in filter(None, owners):
+                    cm.renewm(func=sender, repos=args[0], task_id=owner)
+            except Exception as e:
+                logging.warning(f"CACHE: COULDN'T RENEW OWNERSHIP OF {task_id}: {e}")
+
+    threading.Thread(target=renew, name="cache-owner", daemon=True).start()
+
+
+@task_postrun.connect
+def release_query_repos(sender=None, task_id=None, args=None, state=None, **kwargs):
+    """Drops a finished query task's ownership of the repos
+    it was dispatched for, so that waiting callbacks can tell
+    a missing repo apart from one that's still being queried.
+
+    Tasks that will be retried keep their ownership.
+    """
+    stop = _renewals.pop(task_id, None)
+    if stop is not None:
+        stop.set()
+
+    # query tasks are called with a list of repo_ids
+    if state == states.RETRY or not args or not isinstance(args[0], list):
+        return
+
+    CacheManager().releasem(func=sender, repos=args[0], task_id=task_id)
+
+
+@worker_process_shutdown.connect
+def close_db_connections(**kwargs):
+    """Closes the worker process' pooled connections to
+    the Augur database instead of leaving them to time out.
+    """
+    dispose_engines()
@@ -7,6 +7,7 @@ from flask_login import (
     UserMixin,
 )
 import redis
+from cache_manager.redis_pools import users_client
 from flask import url_for, redirect, abort, session, request, flash, current_app
 import logging
 import json
@@ -66,21 +67,14 @@ def configure_server_login(server):
         Returns:
             User | None: User object if user ID in session, None otherwise.
         """
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-        )
+        users_cache = users_client()
+
+        # the user exists if their JSON was set in the Redis instance
         try:
-            users_cache.ping()
+            if users_cache.exists(id):
+                return User(id)
         except redis.exceptions.ConnectionError:
             logging.error("LOAD_USER: Could not connect to users-cache.")
-            return None
-
-        # return the JSON of a user that was set in the Redis instance
-        if users_cache.exists(id):
-            usn = json.loads(users_cache.get(id))["username"]
-            return User(id)
         return None
 
     @server.route("/logout/")
@@ -96,20 +90,15 @@ def configure_server_login(server):
             None
 
         """
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-        )
-        try:
-            users_cache.ping()
-        except redis.exceptions.ConnectionError:
-            logging.error("LOGOUT: Could not connect to users-cache.")
-            return redirect("/")
+        users_cache = users_client()
 
         if current_user.is_authenticated:
             c_id = current_user.get_id()
-            users_cache.delete(c_id)
+            try:
+                users_cache.delete(c_id)
+            except redis.exceptions.ConnectionError:
+                logging.error("LOGOUT: Could not connect to users-cache.")
+                return redirect("/")
             logout_user()
             logging.warning(f"USER {c_id} LOGGED OUT")
         else:
@@ -127,17 +116,6 @@ def configure_server_login(server):
         Returns:
             None
         """
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-        )
-        try:
-            users_cache.ping()
-        except redis.exceptions.ConnectionError:
-            logging.error("LOGIN: Could not connect to users-cache.")
-            return redirect("/")
-
         provider = os.environ.get("OAUTH_CLIENT_NAME")
 
         if not current_user.is_anonymous:
@@ -174,16 +152,7 @@ def configure_server_login(server):
         Returns:
             None
         """
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-        )
-        try:
-            users_cache.ping()
-        except redis.exceptions.ConnectionError:
-            logging.error("AUTHORIZE: Could not connect to users-cache.")
-            return redirect("/")
+        users_cache = users_client()
 
         provider = os.environ.get("OAUTH_CLIENT_NAME")
 
@@ -253,7 +222,11 @@ def configure_server_login(server):
             "refresh_token": oauth2_refresh,
             "expiration": oauth2_token_expires,
         }
-        users_cache.set(id_number, json.dumps(serverside_user_data))
+        try:
+            users_cache.set(id_number, json.dumps(serverside_user_data))
+        except redis.exceptions.ConnectionError:
+            logging.error("AUTHORIZE: Could not connect to users-cache.")
+            return redirect("/")
 
         login_user(User(id_number))
         logging.warning("User logged in")
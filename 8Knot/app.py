@@ -13,13 +13,19 @@
 """
 import os
 import sys
+import json
 import logging
+import redis
 import dash
+from flask import abort
+from flask_login import current_user
 from sqlalchemy.exc import SQLAlchemyError
 import plotly.io as plt_io
 import dash_bootstrap_components as dbc
 import dash_bootstrap_templates as dbt
 from db_manager.augur_manager import AugurManager
+from cache_manager.cache_manager import CacheManager
+from cache_manager.redis_pools import users_client
 import _login
 from _celery import celery_app, celery_manager
 
@@ -82,6 +88,29 @@ app = dash.Dash(
 server = app.server
 server = _login.configure_server_login(server)
 
+"""CACHE USAGE VIEW"""
+if os.getenv("CACHE_ADMIN_ENABLED", "False") == "True":
+    # usernames of the logged-in users allowed to see it, comma-separated.
+    cache_admins = {u.strip() for u in os.getenv("CACHE_ADMIN_USERS", "").split(",") if u.strip()}
+
+    @server.route("/cache-usage/")
+    def cache_usage():
+        """Admin view of the bytes cached per (query, repo).
+        Only shown to logged-in users listed in CACHE_ADMIN_USERS."""
+        if not current_user.is_authenticated:
+            abort(401)
+
+        try:
+            user = users_client().get(current_user.get_id())
+        except redis.exceptions.ConnectionError:
+            logging.error("CACHE_USAGE: Could not connect to users-cache.")
+            abort(503)
+
+        if user is None or json.loads(user).get("username") not in cache_admins:
+            abort(403)
+
+        return CacheManager().usage().to_html(index=False)
+
 
 """DASH PAGES LAYOUT"""
 # layout of the app stored in the app_layout file, must be imported after the app is initiated
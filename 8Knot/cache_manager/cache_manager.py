@@ -1,8 +1,469 @@
 import redis
 import os
+import time
+import uuid
+import logging
 import hashlib
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
 import io
+import datetime as dt
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from celery import chord, group, states
+from celery.result import AsyncResult
+from cache_manager.local_cache import LocalCache
+from cache_manager.redis_pools import cache_client
+
+# upper bound on how long a single 'wait_ready' call blocks before
+# the caller re-checks the cache itself. Protects against missed
+# notifications if the pub/sub connection drops.
+READY_TIMEOUT = float(os.getenv("CACHE_READY_TIMEOUT", "30"))
+
+# seconds that cached data lives for. Defaults to Augur's daily collection
+# cadence. Can be set per query type w/ e.g. CACHE_TTL_COMMITS_QUERY.
+DEFAULT_TTL = int(os.getenv("CACHE_TTL", "86400"))
+
+# total bytes of query data the cache may hold. 0 means no budget.
+MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", "0"))
+
+# which entries are evicted first when over budget:
+# "lru" (least recently read) or "lfu" (least frequently read)
+EVICTION_POLICY = os.getenv("CACHE_EVICTION_POLICY", "lru")
+
+# bookkeeping for the eviction policy
+SIZES_KEY = "cache_sizes"  # hash: key -> bytes
+NAMES_KEY = "cache_names"  # hash: key -> "query:repo"
+ACCESS_KEY = "cache_access"  # sorted set: key -> last read time | number of reads
+TOTAL_KEY = "cache_total_bytes"  # int: sum of 'cache_sizes'
+VERSION_KEY = "cache_version"  # int: bumped by every 'setm'
+
+# seconds the bytes of data that was set are kept as an estimate of its size,
+# after the data itself has expired or been evicted.
+ESTIMATE_TTL = int(os.getenv("CACHE_ESTIMATE_TTL", str(30 * 86400)))
+
+# number of entries considered per eviction round-trip
+EVICTION_BATCH = 50
+
+# seconds between sweeps that drop the bookkeeping of expired entries.
+PRUNE_INTERVAL = int(os.getenv("CACHE_PRUNE_INTERVAL", "300"))
+PRUNED_KEY = "cache_pruned"  # set while the last sweep is recent
+
+# seconds a query task owns the (query, repo) pairs it was dispatched for
+# unless it renews the ownership, which running tasks do every OWNER_TTL / 3
+# seconds (see _celery.py). ownership is released when the task finishes, so
+# this bounds how long a lost task's repos wait to be re-dispatched. Keep it
+# well under GRAB_TIMEOUT; a task queued for longer may be dispatched twice.
+OWNER_TTL = int(os.getenv("CACHE_OWNER_TTL", "600"))
+
+# seconds the time slices of a repo's data are kept until they're stitched.
+SLICE_TTL = int(os.getenv("CACHE_SLICE_TTL", "7200"))
+
+# seconds after which data from a query that records watermarks is
+# refreshed with the rows collected since. 0 disables refreshes.
+REFRESH_AGE = int(os.getenv("CACHE_REFRESH_AGE", "21600"))
+
+# seconds after which a refresh re-runs the full query instead, which
+# compacts the appended data and picks up rows changed in place.
+FULL_REFRESH_AGE = int(os.getenv("CACHE_FULL_REFRESH_AGE", "604800"))
+
+# bounds on the repos queried by one task. Larger selections are split
+# into shards that run in parallel across the data workers. Bytes are
+# estimated from the size of each repo's data when it was last cached.
+SHARD_MAX_REPOS = int(os.getenv("QUERY_SHARD_MAX_REPOS", "50"))
+SHARD_MAX_BYTES = int(os.getenv("QUERY_SHARD_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# repos w/ more estimated bytes than this are queried in time slices, by
+# year of the query's 'slice_column', in parallel. 0 disables slicing.
+SLICE_MIN_BYTES = int(os.getenv("QUERY_SLICE_MIN_BYTES", str(128 * 1024 * 1024)))
+SLICE_YEARS = int(os.getenv("QUERY_SLICE_YEARS", "6"))
+
+# task that combines a repo's slices once they're all set.
+STITCH_TASK = "queries.stitch_slices.stitch_slices"
+
+# seconds 'grabm_wait' waits for data before giving up.
+GRAB_TIMEOUT = float(os.getenv("CACHE_GRAB_TIMEOUT", "1800"))
+
+# compression codec of newly cached data: "lz4", "zstd" or "uncompressed".
+COMPRESSION = os.getenv("CACHE_COMPRESSION", "lz4")
+
+# threads used to decode blobs in 'grabm'. Arrow releases the GIL while
+# decompressing and decoding, so this scales with cores.
+DECODE_THREADS = int(os.getenv("CACHE_DECODE_THREADS", str(min(32, (os.cpu_count() or 1) + 4))))
+_decode_pool = ThreadPoolExecutor(max_workers=DECODE_THREADS, thread_name_prefix="cache-decode")
+
+# threads used to serialize query results in 'serialize_by_repo'.
+# compression releases the GIL as well.
+ENCODE_THREADS = int(os.getenv("CACHE_ENCODE_THREADS", str(min(8, os.cpu_count() or 1))))
+_encode_pool = ThreadPoolExecutor(max_workers=ENCODE_THREADS, thread_name_prefix="cache-encode")
+
+# per-process cache of decoded data in front of Redis. 0 disables it.
+L1_MAX_BYTES = int(os.getenv("CACHE_L1_MAX_BYTES", str(512 * 1024 * 1024)))
+_l1 = LocalCache(max_bytes=L1_MAX_BYTES)
+
+# cached data written by 'serialize' starts with an 8-byte header:
+# magic (6 bytes), format version (1 byte), codec (1 byte).
+# data without the header is plain, uncompressed feather.
+HEADER_MAGIC = b"8KNOT\x00"
+HEADER_VERSION = 1
+HEADER_SIZE = 8
+CODEC_IDS = {"uncompressed": 0, "lz4": 1, "zstd": 2}
+CODEC_NAMES = {v: k for k, v in CODEC_IDS.items()}
+
+# schema metadata of data stored in time order: the column it's sorted by.
+# nulls come first, so the column's int64 values are non-decreasing.
+SORTED_BY_KEY = b"8knot.sorted_by"
+
+# drops the bookkeeping (KEYS[1..4]: sizes, names, access, total) of the
+# entries among KEYS[5..] whose data no longer exists. returns the bytes dropped.
+# if ARGV[1] is "1", the total is then recomputed from the sizes that are left,
+# which corrects any drift from the incremental updates in 'setm' and '_evict'.
+PRUNE_SCRIPT = """
+local freed = 0
+for i = 5, #KEYS do
+    if redis.call('exists', KEYS[i]) == 0 then
+        freed = freed + tonumber(redis.call('hget', KEYS[1], KEYS[i]) or 0)
+        redis.call('hdel', KEYS[1], KEYS[i])
+        redis.call('hdel', KEYS[2], KEYS[i])
+        redis.call('zrem', KEYS[3], KEYS[i])
+    end
+end
+if ARGV[1] == '1' then
+    local total = 0
+    for _, size in ipairs(redis.call('hvals', KEYS[1])) do
+        total = total + tonumber(size)
+    end
+    redis.call('set', KEYS[4], total)
+end
+return freed
+"""
+
+# deletes an owner key only if it's still held by the releasing task.
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# extends an owner key's TTL (ARGV[2]) only if it's still held by the renewing task.
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def serialize(df, compression=COMPRESSION, schema=None, sort_by=None):
+    """Converts a DataFrame into the cache's storage format:
+    a header recording the codec followed by an Arrow IPC (feather) file
+    whose buffers are compressed with that codec.
+
+    If a 'schema' is declared, the data is stored w/ exactly its columns
+    and types, e.g. dictionary-encoded strings and int32 ids, instead of
+    the types pandas infers.
+
+    If 'sort_by' is passed, the data is stored sorted by that (time) column,
+    nulls first, and the column is recorded in the schema metadata so
+    readers can rely on the order, see 'sorted_by'.
+
+    Args:
+        df (pd.DataFrame | pa.Table): data to store
+        compression (str): "lz4", "zstd" or "uncompressed"
+        schema (pa.Schema | None): columns and types to store
+        sort_by (str | None): column to store the data sorted by
+
+    Returns:
+        bytes: value to set in the cache
+    """
+    if schema is not None:
+        df = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+    if sort_by is not None:
+        if isinstance(df, pd.DataFrame):
+            df = pa.Table.from_pandas(df, preserve_index=False)
+        df = df.take(np.argsort(sort_keys(df.column(sort_by)), kind="stable"))
+        df = df.replace_schema_metadata({**(df.schema.metadata or {}), SORTED_BY_KEY: sort_by.encode()})
+
+    b = io.BytesIO()
+    b.write(HEADER_MAGIC + bytes([HEADER_VERSION, CODEC_IDS[compression]]))
+    feather.write_feather(df, b, compression=compression)
+
+    return b.getvalue()
+
+
+def serialize_by_repo(frames, transform=None, schema=None, sort_by=None):
+    """Serializes each repo's query results, several repos at once.
+
+    Repos are processed and serialized on the encode pool while the
+    next are still being read from 'frames', and are yielded in the
+    order they were read. At most 2 * ENCODE_THREADS repos are in
+    flight, so memory stays bounded however many repos there are.
+
+    Args:
+        frames (iter[(int, pd.DataFrame)]): repo_ids and their results,
+            e.g. from 'AugurManager.stream_query_by_repo'. Repos w/o rows
+            should be included as empty dataframes so they're stored too.
+        transform (function | None): called as transform(repo, df) before
+            serializing; returns the data to store, or None to skip the repo.
+        schema (pa.Schema | None): columns and types to store, see 'serialize'.
+        sort_by (str | None): column to store the data sorted by, see 'serialize'.
+
+    Yields:
+        (int, bytes | None): repo_id and its value to set in the cache, None if skipped.
+    """
+
+    def encode(repo, df):
+        if transform is not None:
+            df = transform(repo, df)
+        return None if df is None else serialize(df, schema=schema, sort_by=sort_by)
+
+    pending = deque()
+    for repo, df in frames:
+        pending.append((repo, _encode_pool.submit(encode, repo, df)))
+        if len(pending) >= 2 * ENCODE_THREADS:
+            repo, future = pending.popleft()
+            yield repo, future.result()
+
+    while pending:
+        repo, future = pending.popleft()
+        yield repo, future.result()
+
+
+def readable(blob):
+    """Checks that a value from the cache is in a format this version
+    of the app reads: plain feather, or a header w/ a known format
+    version and codec followed by feather.
+
+    Args:
+        blob (bytes): value from the cache
+
+    Returns:
+        bool: whether 'deserialize_table' can read the value
+    """
+    if blob[: len(HEADER_MAGIC)] != HEADER_MAGIC:
+        return True
+    return blob[len(HEADER_MAGIC)] == HEADER_VERSION and blob[HEADER_SIZE - 1] in CODEC_NAMES
+
+
+def deserialize_table(blob, columns=None):
+    """Converts a value from the cache into an Arrow Table.
+    Reads both 'serialize' output and plain feather written
+    before the header was introduced.
+
+    The bytes are wrapped in an Arrow buffer rather than copied,
+    and Arrow IPC stores each column in its own (separately compressed)
+    buffers, so when 'columns' is passed only those buffers are read
+    and decompressed; the rest of the blob is skipped.
+
+    Args:
+        blob (bytes): value from the cache
+        columns (list[str] | None): columns to read, all if None.
+
+    Returns:
+        pa.Table: stored data
+
+    Raises:
+        ValueError: the value's format version or codec is unknown, see 'readable'.
+    """
+    buf = pa.py_buffer(blob)
+    if blob[: len(HEADER_MAGIC)] == HEADER_MAGIC:
+        if blob[len(HEADER_MAGIC)] != HEADER_VERSION:
+            raise ValueError(f"CACHE: UNKNOWN FORMAT VERSION {blob[len(HEADER_MAGIC)]}")
+        codec = CODEC_NAMES.get(blob[HEADER_SIZE - 1])
+        if codec is None:
+            raise ValueError(f"CACHE: UNKNOWN CODEC ID {blob[HEADER_SIZE - 1]}")
+        # Arrow records the codec in the IPC metadata too, so the
+        # reader decompresses the buffers without being told.
+        buf = buf.slice(HEADER_SIZE)
+
+    return feather.read_table(pa.BufferReader(buf), columns=columns)
+
+
+def deserialize(blob, columns=None):
+    """Converts a value from the cache back into a DataFrame.
+    See 'deserialize_table'.
+
+    Args:
+        blob (bytes): value from the cache
+        columns (list[str] | None): columns to read, all if None.
+
+    Returns:
+        pd.DataFrame: stored data
+    """
+    return to_frame(deserialize_table(blob, columns=columns))
+
+
+def to_frame(table):
+    """Converts a decoded value into a DataFrame.
+
+    Dictionary-encoded columns are decoded to plain values first, so callbacks
+    get the same object columns as before, not Categoricals (whose unobserved
+    categories would show up in groupbys). The encoding only saves memory
+    while the data is stored, in Redis and in the local cache.
+
+    Dates are converted to UTC timestamps (midnight), so every time column
+    reaches callbacks as a typed, UTC datetime column that needn't be parsed.
+
+    Args:
+        table (pa.Table): decoded value from the cache
+
+    Returns:
+        pd.DataFrame: stored data
+    """
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+        elif pa.types.is_date(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.timestamp("us", tz="UTC")))
+
+    return table.to_pandas()
+
+
+def sort_keys(column):
+    """Gets int64 keys that order a date or time column, nulls first.
+
+    Args:
+        column (pa.ChunkedArray): date or timestamp column
+
+    Returns:
+        np.ndarray: the column's values as int64, nulls as the smallest int64
+    """
+    if pa.types.is_date32(column.type):
+        column = column.cast(pa.int32())
+    keys = column.cast(pa.int64())
+    return pc.fill_null(keys, np.iinfo(np.int64).min).to_numpy()
+
+
+def sorted_by(table):
+    """Gets the column a decoded value is stored sorted by, see 'serialize'.
+
+    Args:
+        table (pa.Table): decoded value from the cache
+
+    Returns:
+        str | None: column name, None if the data isn't stored in order.
+    """
+    col = (table.schema.metadata or {}).get(SORTED_BY_KEY)
+    if col is None or col.decode() not in table.column_names:
+        return None
+    return col.decode()
+
+
+def merge_runs(table, column):
+    """Merges the sorted runs of a table of concatenated sorted tables.
+
+    The rows are ordered w/ NumPy's stable sort, which is a timsort for
+    the int64 keys: it detects the runs that are already in order and
+    merges them, so it costs about O(n log k) for k runs rather than
+    a full sort. The runs needn't be given.
+
+    Args:
+        table (pa.Table): concatenated tables, each sorted by 'column' w/ nulls first
+        column (str): time column the tables are sorted by
+
+    Returns:
+        pa.Table: the rows sorted by 'column', nulls first
+    """
+    return table.take(np.argsort(sort_keys(table.column(column)), kind="stable"))
+
+
+def concat_tables(tables):
+    """Concatenates per-repo tables into one DataFrame,
+    converting to pandas once at the end.
+
+    Repos without rows are dropped first: their columns are often
+    typed null/double by pandas and would not merge with the real types.
+
+    If every table is stored sorted by the same column, their runs are
+    merged w/ 'merge_runs' and the DataFrame's attrs["sorted_by"] names
+    the column, so callbacks can skip sorting it again.
+
+    Args:
+        tables (list[pa.Table]): decoded values from the cache
+
+    Returns:
+        pd.DataFrame: aggregate data
+    """
+    non_empty = [t for t in tables if t.num_rows > 0] or tables[:1]
+    try:
+        table = pa.concat_tables(non_empty, promote_options="default")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # schemas disagree beyond null promotion; let pandas reconcile them
+        return pd.concat([to_frame(t) for t in non_empty], ignore_index=True)
+
+    columns = {sorted_by(t) for t in non_empty}
+    column = columns.pop() if len(columns) == 1 else None
+    if column is None:
+        return to_frame(table)
+
+    # a single table is already in order
+    if len(non_empty) > 1:
+        table = merge_runs(table, column)
+
+    df = to_frame(table)
+    df.attrs["sorted_by"] = column
+    return df
+
+
+def plan_shards(repos, sizes, max_repos=SHARD_MAX_REPOS, max_bytes=SHARD_MAX_BYTES):
+    """Splits repos into shards of at most 'max_repos' repos and about
+    'max_bytes' of estimated data each, to be queried by separate tasks.
+
+    Repos are placed largest first into the first shard they fit in,
+    so big repos are spread out and small ones fill the gaps. A repo
+    larger than 'max_bytes' gets a shard of its own. Repos without an
+    estimate are assumed to be of the average known size.
+
+    Args:
+        repos (list[int]): repo_ids to split
+        sizes (list[int | None]): estimated bytes per repo, None if unknown.
+        max_repos (int): most repos per shard
+        max_bytes (int): target bytes per shard
+
+    Returns:
+        list[list[int]]: shards of repo_ids
+    """
+    known = [s for s in sizes if s is not None]
+    default = sum(known) // len(known) if known else max_bytes // max(max_repos, 1)
+    estimates = [default if s is None else s for s in sizes]
+
+    shards = []
+    totals = []
+    for size, r in sorted(zip(estimates, repos), reverse=True):
+        for i, shard in enumerate(shards):
+            if len(shard) < max_repos and totals[i] + size <= max_bytes:
+                shard.append(r)
+                totals[i] += size
+                break
+        else:
+            shards.append([r])
+            totals.append(size)
+
+    return shards
+
+
+def plan_windows(years=SLICE_YEARS):
+    """Splits time into the windows that a repo's query is sliced by:
+    one per calendar year for the last 'years' years, plus one
+    open-ended window for everything before.
+
+    Args:
+        years (int): number of yearly windows
+
+    Returns:
+        list[[str | None, str | None]]: start (inclusive) and end (exclusive) dates,
+            None where a window is open-ended.
+    """
+    this_year = dt.date.today().year
+    starts = [f"{y}-01-01" for y in range(this_year - years + 1, this_year + 1)]
+    bounds = [None, *starts, None]
+
+    return [[start, end] for start, end in zip(bounds[:-1], bounds[1:])]
 
 
 class CacheManager:
@@ -19,8 +480,8 @@ class CacheManager:
             Creates a unique hash for each job based on the job's calling
             function and the list of repos that the function is being run with.
 
-        set(func, repo, data) :
-            Sets data at key hash(func, repo).
+        set(func, repo, data, window) :
+            Sets data at key hash(func, repo), or one time slice of it.
 
         setm(func, [repo], [data]) :
             Sets [data] at keys [hash(func, repo)] of [repo]
@@ -28,27 +489,88 @@ class CacheManager:
         get(func, repo):
             Returns data at key hash(func, repo), None if Nil.
 
-        getm(func, [repo]):
+        getm(func, [repo], touch):
             Returns data at keys [hash(func, repo)], None if Nil.
             Uses r.mget([keys])
 
+        versionsm(func, [repo]):
+            Returns the version of the data at keys [hash(func, repo)], None if Nil.
+
         exists(func, repo):
             Returns number of names that exist.
 
         existsm(func, [repo]):
             Returns number of names that exist.
 
+        wait_ready(func, [repo], timeout):
+            Blocks until all keys [hash(func, repo)] exist or timeout expires.
+            Woken by the notification that 'setm' publishes.
+
+        subscribe([func], [channel]):
+            Returns a PubSub subscribed to the readiness channels of [func]
+            and any other [channel].
+
+        usage():
+            Returns bytes, TTL and access score per cached (query, repo).
+
+        claimm(func, [repo], task_id, overwrite):
+            Records task_id as the owner of (func, repo) pairs being queried.
+
+        get_ownersm(func, [repo]):
+            Returns the task_id that owns each (func, repo), None if unowned.
+
+        releasem(func, [repo], task_id):
+            Drops task_id's ownership of (func, repo) pairs.
+
+        renewm(func, [repo], task_id):
+            Extends task_id's ownership of (func, repo) pairs by OWNER_TTL.
+
+        missingm(func, [repo]):
+            Returns the repos whose data isn't in the cache.
+
+        set_watermarksm(func, [repo], [watermark], full):
+            Records the newest row collected for each (func, repo) that was set.
+
+        get_watermarksm(func, [repo]):
+            Returns the watermark to query newer rows from, None if a full query is due.
+
+        stalem(func, [repo]):
+            Returns the cached repos whose data is due an incremental refresh.
+
+        refreshm(func, [repo], priority):
+            Enqueues func for stale repos that no task owns.
+
+        stitch_slicesm(func, repo, [window]):
+            Combines the time slices of a repo's data, set w/ set(..., window), into its value.
+
+        estimatesm(func, [repo]):
+            Returns the bytes each (func, repo) had when last set, None if never set.
+
+        dispatchm(func, [repo], priority):
+            Enqueues func for missing repos that no live task owns, in
+            parallel shards if there are many.
+            Returns the IDs of the tasks querying for the missing repos.
+
+        grabm(func, [repo], [column]):
+            Builds the aggregate DataFrame of [column] if all data is available.
+
+        grabm_wait(func, [repo], [column], timeout):
+            Waits for data, re-dispatching queries for orphaned repos,
+            and builds the aggregate DataFrame. None if timeout expires.
+
+    Data is set with a per-query TTL. If CACHE_MAX_BYTES is set, the
+    least recently (or frequently) read entries are evicted once the
+    total size of cached data exceeds it.
+
+    'grabm' keeps decoded data in a per-process LRU cache, keyed by the
+    version 'setm' assigns, up to CACHE_L1_MAX_BYTES.
+
     """
 
     def __init__(self, decode_value=False):
-        # Redis cache for job queue and results cache
-        self._redis = redis.StrictRedis(
-            # openshift, compose will reconcile the 'redis' naming via the dns
-            host=os.getenv("REDIS_SERVICE_HOST", "redis-cache"),
-            port=os.getenv("REDIS_SERVICE_PORT", "6379"),
-            password=os.getenv("REDIS_PASSWORD", ""),
-            decode_responses=decode_value,
-        )
+        # Redis cache for job queue and results cache,
+        # on the process' shared connection pool.
+        self._redis = cache_client(decode_responses=decode_value)
 
     def _get_hash(self, func, repo):
         """
@@ -85,44 +607,240 @@ class CacheManager:
 
         return h
 
-    def set(self, func, repo, data):
+    def _get_channel(self, func):
+        """
+        (private)
+        Name of the pub/sub channel on which readiness of
+        data for 'func' is announced.
+
+        Args:
+        -----
+            func (function): Query function used
+
+        Returns:
+        --------
+            str: channel name
+        """
+        return f"{func.__name__}_ready"
+
+    def _get_ttl(self, func):
+        """
+        (private)
+        Seconds that data of 'func' lives in the cache for.
+
+        Args:
+        -----
+            func (function): Query function used
+
+        Returns:
+        --------
+            int: TTL in seconds
+        """
+        return int(os.getenv(f"CACHE_TTL_{func.__name__.upper()}", DEFAULT_TTL))
+
+    def _touch(self, pipe, hs):
+        """
+        (private)
+        Records a read of keys 'hs' for the eviction policy.
+
+        Args:
+        -----
+            pipe (redis.client.Pipeline): pipeline to queue commands on
+            hs (list[str]): keys that were read
+        """
+        if EVICTION_POLICY == "lfu":
+            for h in hs:
+                pipe.zincrby(ACCESS_KEY, 1, h)
+        else:
+            # only update keys that are already tracked
+            pipe.zadd(ACCESS_KEY, {h: time.time() for h in hs}, xx=True)
+
+    def _prune(self):
+        """
+        (private)
+        Drops the bookkeeping of entries whose data no longer exists,
+        e.g. because its TTL expired, then recomputes the total bytes.
+        Runs at most once per PRUNE_INTERVAL, across all processes.
+
+        Returns:
+        --------
+            int: number of bytes dropped
+        """
+        if not self._redis.set(PRUNED_KEY, 1, ex=PRUNE_INTERVAL, nx=True):
+            return 0
+
+        prune = self._redis.register_script(PRUNE_SCRIPT)
+        bookkeeping = [SIZES_KEY, NAMES_KEY, ACCESS_KEY, TOTAL_KEY]
+
+        # checked and dropped atomically, so an entry set meanwhile keeps its bookkeeping.
+        # the last batch (or an empty one) recomputes the total.
+        keys = self._redis.hkeys(SIZES_KEY)
+        batches = [keys[i : i + EVICTION_BATCH] for i in range(0, len(keys), EVICTION_BATCH)] or [[]]
+        dropped = 0
+        for i, batch in enumerate(batches):
+            dropped += int(prune(keys=bookkeeping + batch, args=[int(i == len(batches) - 1)]))
+
+        if dropped:
+            logging.warning(f"CACHE: PRUNED {dropped} BYTES OF EXPIRED ENTRIES")
+
+        return dropped
+
+    def _evict(self, protected=None):
+        """
+        (private)
+        Evicts entries, least recently / frequently read first,
+        until the cached data fits in MAX_BYTES.
+
+        Entries whose TTL has already expired are removed from the
+        bookkeeping first, see '_prune', whether or not there's a budget.
+
+        Args:
+        -----
+            protected (list[str] | None): keys that mustn't be evicted, e.g. just set.
+
+        Returns:
+        --------
+            int: number of bytes released
+        """
+        self._prune()
+
+        if MAX_BYTES <= 0:
+            return 0
+
+        protected = set(protected or ())
+        total = int(self._redis.get(TOTAL_KEY) or 0)
+        released = 0
+        offset = 0
+
+        while total > MAX_BYTES:
+            candidates = self._redis.zrange(ACCESS_KEY, offset, offset + EVICTION_BATCH - 1)
+            if not candidates:
+                logging.warning(f"CACHE: {total} BYTES OVER {MAX_BYTES} BUDGET, NOTHING EVICTABLE")
+                break
+
+            candidates = [c.decode() if isinstance(c, bytes) else c for c in candidates]
+            victims = [c for c in candidates if c not in protected]
+            offset += len(candidates) - len(victims)
+
+            # release just enough to get under budget
+            sizes = self._redis.hmget(SIZES_KEY, victims)
+            drop, freed = [], 0
+            for v, size in zip(victims, sizes):
+                if total - freed <= MAX_BYTES:
+                    break
+                drop.append(v)
+                freed += int(size or 0)
+
+            if not drop:
+                continue
+
+            with self._redis.pipeline() as pipe:
+                pipe.delete(
+                    *drop,
+                    *[self._get_version_key(v) for v in drop],
+                    *[self._get_meta_key(v) for v in drop],
+                )
+                pipe.zrem(ACCESS_KEY, *drop)
+                pipe.hdel(SIZES_KEY, *drop)
+                pipe.hdel(NAMES_KEY, *drop)
+                pipe.decrby(TOTAL_KEY, freed)
+                pipe.execute()
+
+            total -= freed
+            released += freed
+
+        if released:
+            logging.warning(f"CACHE: EVICTED {released} BYTES")
+
+        return released
+
+    def set(self, func, repo, data, window=None):
         """Sets redis value as data at name=hash(func, repo)
 
+        If 'window' is given, data is one time slice of the repo's data.
+        It's kept apart, and isn't readable, until 'stitch_slicesm'
+        combines the repo's slices.
+
         Args:
             func (function): Query function used
             repo (int): repo_id of repo
             data (list(dict)): rows of data in dictionary format.
+            window ([str | None, str | None] | None): time slice the data is of.
 
         Returns:
             boolean: confirmation of successful set operation.
         """
 
-        # set redis value at 'name=hash' to 'data'
-        ack = self._redis.set(name=self._get_hash(func=func, repo=repo), value=data)
+        if window is not None:
+            # only needed until the slices are stitched
+            sk = self._get_slice_key(self._get_hash(func, repo), window)
+            return bool(self._redis.set(name=sk, value=data, ex=SLICE_TTL))
 
-        return ack
+        # set as a list of one, keeps eviction bookkeeping in one place.
+        return self.setm(func=func, repos=[repo], datas=[data])
 
     def setm(self, func, repos, datas):
         """Sets many redis value as data at name=hash(func, repo)
 
+        Each value expires after the query's TTL. If the cache
+        is over its byte budget afterward, other entries are evicted.
+
+        Every call takes a new version from a global counter, so versions
+        never repeat even if an entry expires and is set again.
+
         Args:
             func (function): Query function used
             repo (list[int]): list of repo_ids of repos
             data (list[list(dict)]): list of rows of data in dictionary format.
 
         Returns:
-            list[boolean]: confirmations of successful set operations.
+            boolean: confirmation of successful set operations.
         """
 
         # create hashes for each (func, repo_id) pair
         hs = [self._get_hash(func, r) for r in repos]
         ds = datas
 
-        # bulk-set keys to values in Redis
-        acks = self._redis.mset(dict(zip(hs, ds)))
+        ttl = self._get_ttl(func)
 
-        # from redis docs: "(Return is) always OK since MSET can't fail."
-        return acks
+        # sizes of the values being replaced, if any.
+        old_sizes = self._redis.hmget(SIZES_KEY, hs)
+        delta = sum(len(d) for d in ds) - sum(int(o or 0) for o in old_sizes)
+
+        version = self._redis.incr(VERSION_KEY)
+
+        # new entries haven't been read yet. under LFU they start at the median
+        # read count, rather than the lowest, so they aren't the first evicted.
+        if EVICTION_POLICY == "lfu":
+            middle = self._redis.zcard(ACCESS_KEY) // 2
+            median = self._redis.zrange(ACCESS_KEY, middle, middle, withscores=True)
+            seed = median[0][1] if median else 0
+
+        with self._redis.pipeline() as pipe:
+            for h, d in zip(hs, ds):
+                pipe.set(name=h, value=d, ex=ttl)
+            for h in hs:
+                pipe.set(name=self._get_version_key(h), value=version, ex=ttl)
+
+            # bookkeeping for the eviction policy and usage view
+            pipe.hset(SIZES_KEY, mapping={h: len(d) for h, d in zip(hs, ds)})
+            pipe.hset(NAMES_KEY, mapping={h: f"{func.__name__}:{r}" for h, r in zip(hs, repos)})
+            for h, d in zip(hs, ds):
+                pipe.set(name=self._get_estimate_key(h), value=len(d), ex=ESTIMATE_TTL)
+            if EVICTION_POLICY == "lfu":
+                pipe.zadd(ACCESS_KEY, {h: seed for h in hs}, nx=True)
+            else:
+                pipe.zadd(ACCESS_KEY, {h: time.time() for h in hs})
+            pipe.incrby(TOTAL_KEY, delta)
+
+            acks = pipe.execute()[: len(hs)]
+
+        self._evict(protected=hs)
+
+        # wake up any callbacks that are waiting on this data
+        self._redis.publish(self._get_channel(func), ",".join(str(r) for r in repos))
+
+        return all(acks)
 
     def get(self, func, repo):
         """Get redis value as data at name=hash(func, repo)
@@ -135,17 +853,19 @@ class CacheManager:
             boolean: confirmation of successful set operation.
         """
 
-        # get redis value at "name=hash"
-        r = self._redis.get(name=self._get_hash(func, repo))
+        return self.getm(func=func, repos=[repo])[0]
 
-        return r
-
-    def getm(self, func, repos):
+    def getm(self, func, repos, touch=True):
         """Gets many redis value as data at name=hash(func, repo)
 
+        Values in a format this version can't read, e.g. set by a newer
+        version during a rolling deploy, are dropped and returned as None,
+        so they're missing and get queried again.
+
         Args:
             func (function): Query function used
             repo (list[int]): list of repo_ids of repos
+            touch (bool): record the read for the eviction policy.
 
         Returns:
             (list[list(dict)]): list of rows of data in dictionary format.
@@ -154,12 +874,47 @@ class CacheManager:
         # create hashes for each (func, repo_id) pair
         hs = [self._get_hash(func, r) for r in repos]
 
-        # bulk-get values from keys in Redis
-        rs = self._redis.mget(hs)
+        # bulk-get values from keys in Redis, recording the read
+        # for the eviction policy in the same round-trip.
+        with self._redis.pipeline(transaction=False) as pipe:
+            pipe.mget(hs)
+            if touch:
+                self._touch(pipe, hs)
+            rs = pipe.execute()[0]
+
+        unreadable = [i for i, b in enumerate(rs) if b is not None and not readable(b)]
+        if unreadable:
+            logging.warning(
+                f"CACHE: {func.__name__} DROPPING UNREADABLE DATA OF REPOS {[repos[i] for i in unreadable]}"
+            )
+            drop = [hs[i] for i in unreadable]
+            self._redis.delete(*drop, *[self._get_version_key(h) for h in drop], *[self._get_meta_key(h) for h in drop])
+            rs = [None if i in unreadable else b for i, b in enumerate(rs)]
 
         # return results
         return rs
 
+    def versionsm(self, func, repos):
+        """Gets the version of the data at name=hash(func, repo).
+        Records a read of the data for the eviction policy, so
+        callers that don't fetch the data itself still count as readers.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+
+        Returns:
+            list[int | None]: version per repo, None if Nil.
+        """
+        hs = [self._get_hash(func, r) for r in repos]
+
+        with self._redis.pipeline(transaction=False) as pipe:
+            pipe.mget([self._get_version_key(h) for h in hs])
+            self._touch(pipe, hs)
+            vs = pipe.execute()[0]
+
+        return [int(v) if v is not None else None for v in vs]
+
     def exists(self, func, repo):
         """Checks whether key is in Redis for hash(func, repo)
 
@@ -197,13 +952,617 @@ class CacheManager:
         # return results
         return n
 
-    def grabm(self, func, repos):
+    def wait_ready(self, func, repos, timeout=READY_TIMEOUT):
+        """Blocks until data for all (func, repo) pairs is
+        available or until 'timeout' seconds have passed.
+
+        Subscribes to the readiness channel that 'setm' publishes to
+        so that waiting callbacks don't poll Redis.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+            timeout (float): max seconds to block
+
+        Returns:
+            boolean: whether all data is available.
+        """
+
+        pubsub = self.subscribe(funcs=[func])
+
+        try:
+            deadline = time.monotonic() + timeout
+
+            # check after subscribing so that data set between the caller's
+            # last check and the subscription isn't missed.
+            while self.existsm(func=func, repos=repos) != len(repos):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+
+                # returns early on any message on the channel
+                pubsub.get_message(timeout=remaining)
+        finally:
+            pubsub.close()
+
+        return True
+
+    def subscribe(self, funcs, channels=[]):
+        """Creates a PubSub object subscribed to the readiness
+        channels of each function in 'funcs' and to any other
+        named channels on the cache's Redis instance.
+
+        Caller is responsible for closing the returned object.
+
+        Args:
+            funcs (list[function]): Query functions whose readiness is watched
+            channels (list[str | bytes]): other channels to subscribe to
+
+        Returns:
+            redis.client.PubSub: subscribed PubSub object
+        """
+
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(*[self._get_channel(f) for f in funcs], *channels)
+
+        return pubsub
+
+    def usage(self):
+        """Reports the size of each cached (query, repo) entry.
+
+        Returns:
+            pd.DataFrame: query, repo, bytes, ttl and access score per entry,
+                largest first.
+        """
+
+        names = self._redis.hgetall(NAMES_KEY)
+        sizes = self._redis.hgetall(SIZES_KEY)
+        access = dict(self._redis.zrange(ACCESS_KEY, 0, -1, withscores=True))
+
+        keys = list(names.keys())
+        with self._redis.pipeline(transaction=False) as pipe:
+            for k in keys:
+                pipe.ttl(k)
+            ttls = pipe.execute()
+
+        rows = []
+        for k, ttl in zip(keys, ttls):
+            # TTL of -2 means the key has already expired
+            if ttl == -2:
+                continue
+            query, repo = (names[k].decode() if isinstance(names[k], bytes) else names[k]).split(":")
+            rows.append(
+                {
+                    "query": query,
+                    "repo": int(repo),
+                    "bytes": int(sizes.get(k, 0)),
+                    "ttl": ttl,
+                    EVICTION_POLICY: access.get(k),
+                }
+            )
+
+        df = pd.DataFrame(rows, columns=["query", "repo", "bytes", "ttl", EVICTION_POLICY])
+        return df.sort_values(by="bytes", ascending=False).reset_index(drop=True)
+
+    def _get_owner_key(self, h):
+        """
+        (private)
+        Key at which the ID of the task querying for the data at 'h' is stored.
+
+        Args:
+        -----
+            h (str): hash(func, repo)
+
+        Returns:
+        --------
+            str: owner key
+        """
+        return f"{h}_owner"
+
+    def _get_version_key(self, h):
+        """
+        (private)
+        Key at which the version of the data at 'h' is stored.
+
+        Args:
+        -----
+            h (str): hash(func, repo)
+
+        Returns:
+        --------
+            str: version key
+        """
+        return f"{h}_version"
+
+    def _get_estimate_key(self, h):
+        """
+        (private)
+        Key at which the bytes of the data last set at 'h' are kept,
+        for ESTIMATE_TTL seconds, see 'estimatesm'.
+
+        Args:
+        -----
+            h (str): hash(func, repo)
+
+        Returns:
+        --------
+            str: estimate key
+        """
+        return f"{h}_estimate"
+
+    def _get_slice_key(self, h, window):
+        """
+        (private)
+        Key of one time slice of the data at 'h', see 'plan_windows'.
+
+        Args:
+        -----
+            h (str): hash(func, repo)
+            window ([str | None, str | None]): start and end of the slice
+
+        Returns:
+        --------
+            str: slice key
+        """
+        return f"{h}_slice_{window[0]}_{window[1]}"
+
+    def _get_meta_key(self, h):
+        """
+        (private)
+        Key of the hash recording the watermark of the data at 'h'
+        and when it was last refreshed and last fully queried.
+
+        Args:
+        -----
+            h (str): hash(func, repo)
+
+        Returns:
+        --------
+            str: meta key
+        """
+        return f"{h}_meta"
+
+    def claimm(self, func, repos, task_id, overwrite=False):
+        """Records 'task_id' as the task that's querying for (func, repo).
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+            task_id (str): ID of the Celery task
+            overwrite (bool): take ownership even if another task owns the repo.
+
+        Returns:
+            list[int]: repos that 'task_id' now owns.
+        """
+
+        hs = [self._get_hash(func, r) for r in repos]
+
+        with self._redis.pipeline(transaction=False) as pipe:
+            for h in hs:
+                pipe.set(name=self._get_owner_key(h), value=task_id, ex=OWNER_TTL, nx=not overwrite)
+            acks = pipe.execute()
+
+        return [r for r, ack in zip(repos, acks) if ack]
+
+    def get_ownersm(self, func, repos):
+        """Gets the ID of the task that's querying for each (func, repo).
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+
+        Returns:
+            list[str | None]: owning task ID per repo, None if unowned.
+        """
+
+        hs = [self._get_hash(func, r) for r in repos]
+        owners = self._redis.mget([self._get_owner_key(h) for h in hs])
+
+        return [o.decode() if isinstance(o, bytes) else o for o in owners]
+
+    def releasem(self, func, repos, task_id):
+        """Drops 'task_id's ownership of (func, repo), if it still has it.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+            task_id (str): ID of the Celery task
+        """
+
+        release = self._redis.register_script(RELEASE_SCRIPT)
+
+        with self._redis.pipeline(transaction=False) as pipe:
+            for r in repos:
+                release(keys=[self._get_owner_key(self._get_hash(func, r))], args=[task_id], client=pipe)
+            pipe.execute()
+
+    def renewm(self, func, repos, task_id):
+        """Extends 'task_id's ownership of (func, repo) by OWNER_TTL
+        seconds, if it still has it.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+            task_id (str): ID of the Celery task
+        """
+
+        renew = self._redis.register_script(RENEW_SCRIPT)
+
+        with self._redis.pipeline(transaction=False) as pipe:
+            for r in repos:
+                renew(keys=[self._get_owner_key(self._get_hash(func, r))], args=[task_id, OWNER_TTL], client=pipe)
+            pipe.execute()
+
+    def missingm(self, func, repos):
+        """Finds the repos whose (func, repo) data isn't in the cache.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+
+        Returns:
+            list[int]: repo_ids of repos without data.
+        """
+
+        with self._redis.pipeline(transaction=False) as pipe:
+            for r in repos:
+                pipe.exists(self._get_hash(func, r))
+            found = pipe.execute()
+
+        return [r for r, f in zip(repos, found) if not f]
+
+    def set_watermarksm(self, func, repos, watermarks, full, window=None):
+        """Records the watermark, i.e. the newest collection time, of the
+        rows just set for each (func, repo), so that the next refresh
+        only queries the rows collected since.
+
+        Should be called after 'setm'. Repos without a watermark,
+        e.g. because they have no rows, are fully queried next time.
+
+        If 'window' is given, the watermarks are of one time slice of each
+        repo's data. They're kept w/ the slice, and 'stitch_slicesm' records
+        the oldest of them once the repo's slices are combined.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+            watermarks (list[str | None]): watermark per repo
+            full (bool): whether the data was fully queried or appended to.
+            window ([str | None, str | None] | None): time slice the watermarks are of.
+        """
+
+        if window is not None:
+            with self._redis.pipeline(transaction=False) as pipe:
+                for r, w in zip(repos, watermarks):
+                    # slices w/o rows don't bound the repo's watermark
+                    if w is not None:
+                        sk = self._get_slice_key(self._get_hash(func, r), window)
+                        pipe.set(name=f"{sk}_watermark", value=w, ex=SLICE_TTL)
+                pipe.execute()
+            return
+
+        ttl = self._get_ttl(func)
+        now = time.time()
+
+        with self._redis.pipeline() as pipe:
+            for r, w in zip(repos, watermarks):
+                mk = self._get_meta_key(self._get_hash(func, r))
+                if w is None:
+                    pipe.delete(mk)
+                    continue
+
+                meta = {"watermark": w, "refreshed": now}
+                if full:
+                    meta["full"] = now
+                pipe.hset(mk, mapping=meta)
+                pipe.expire(mk, ttl)
+            pipe.execute()
+
+    def _get_metasm(self, func, repos):
+        """
+        (private)
+        Gets the meta hash of each (func, repo) whose data is cached.
+
+        Args:
+        -----
+            func (function): Query function used
+            repos (list[int]): list of repo_ids of repos
+
+        Returns:
+        --------
+            list[dict | None]: meta per repo, None if no data or no watermark.
+        """
+
+        hs = [self._get_hash(func, r) for r in repos]
+
+        with self._redis.pipeline(transaction=False) as pipe:
+            for h in hs:
+                pipe.exists(h)
+                pipe.hgetall(self._get_meta_key(h))
+            rs = pipe.execute()
+
+        metas = []
+        for found, meta in zip(rs[::2], rs[1::2]):
+            meta = {(k.decode() if isinstance(k, bytes) else k): v for k, v in meta.items()}
+            metas.append(meta if found and "watermark" in meta else None)
+
+        return metas
+
+    def get_watermarksm(self, func, repos):
+        """Gets the watermark from which to query newer rows for each (func, repo).
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+
+        Returns:
+            list[str | None]: watermark per repo, None if a full query is due.
+        """
+
+        now = time.time()
+        watermarks = []
+        for meta in self._get_metasm(func=func, repos=repos):
+            if meta is None or now - float(meta.get("full", 0)) > FULL_REFRESH_AGE:
+                watermarks.append(None)
+            else:
+                w = meta["watermark"]
+                watermarks.append(w.decode() if isinstance(w, bytes) else w)
+
+        return watermarks
+
+    def stalem(self, func, repos):
+        """Finds the cached repos whose data is due an incremental refresh.
+        Only data with a watermark can be refreshed; other data is
+        queried again once it expires.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+
+        Returns:
+            list[int]: repo_ids of repos due a refresh.
+        """
+        if REFRESH_AGE <= 0:
+            return []
+
+        now = time.time()
+        metas = self._get_metasm(func=func, repos=repos)
+
+        return [r for r, m in zip(repos, metas) if m is not None and now - float(m["refreshed"]) > REFRESH_AGE]
+
+    def refreshm(self, func, repos, priority=None):
+        """Enqueues 'func' for the cached repos that are due a refresh
+        and that no task owns. The cached data stays readable meanwhile.
+
+        Args:
+            func (function): Query function (Celery task) used
+            repo (list[int]): list of repo_ids of repos
+            priority (int | None): priority of the task, the queue's default if None.
+
+        Returns:
+            list[int]: repos that are being refreshed by a new task.
+        """
+
+        stale = self.stalem(func=func, repos=repos)
+        if not stale:
+            return []
+
+        claimed = self._launchm(func=func, repos=stale, priority=priority)
+
+        if claimed:
+            logging.warning(f"CACHE: {func.__name__} REFRESHING REPOS {claimed}")
+
+        return claimed
+
+    def stitch_slicesm(self, func, repo, windows):
+        """Combines the time slices of a repo's data into its value,
+        then drops the slices.
+
+        Args:
+            func (function): Query function used
+            repo (int): repo_id of repo
+            windows (list[[str | None, str | None]]): the repo's slices
+
+        Returns:
+            boolean: confirmation of successful set operation, False if a slice is missing.
+        """
+
+        h = self._get_hash(func, repo)
+        sks = [self._get_slice_key(h, w) for w in windows]
+        wks = [f"{sk}_watermark" for sk in sks]
+
+        blobs = self._redis.mget(sks)
+        if any(b is None for b in blobs):
+            logging.error(f"CACHE: {func.__name__} MISSING SLICES OF REPO {repo}")
+            return False
+
+        tables = list(_decode_pool.map(deserialize_table, blobs))
+
+        # slices are in time order, so data sorted by the sliced column is still
+        # sorted (and keeps the flag). data sorted by another column is sorted again.
+        column = sorted_by(tables[0]) if tables else None
+        resort = column if column != getattr(func, "slice_column", None) else None
+        try:
+            # slices share the query's schema; keep its types
+            data = serialize(pa.concat_tables(tables, promote_options="default"), sort_by=resort)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # reconciled by pandas, so stored w/ the query's declared types again
+            # and sorted, as the order flag doesn't survive the conversion.
+            data = serialize(concat_tables(tables), schema=getattr(func, "cache_schema", None), sort_by=column)
+
+        ack = self.set(func=func, repo=repo, data=data)
+
+        # rows collected while the slices were queried are newer than
+        # the oldest slice's watermark, so the next refresh gets them.
+        marks = [m.decode() for m in self._redis.mget(wks) if m is not None]
+        if ack and marks:
+            self.set_watermarksm(func=func, repos=[repo], watermarks=[min(marks, key=pd.Timestamp)], full=True)
+
+        self._redis.delete(*sks, *wks)
+        return ack
+
+    def estimatesm(self, func, repos):
+        """Gets the bytes of data each (func, repo) had when it was last set.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+
+        Returns:
+            list[int | None]: estimated bytes per repo, None if not set within ESTIMATE_TTL.
+        """
+
+        hs = [self._get_hash(func, r) for r in repos]
+        return [None if e is None else int(e) for e in self._redis.mget([self._get_estimate_key(h) for h in hs])]
+
+    def _launchm(self, func, repos, priority=None, sliced=False):
+        """
+        (private)
+        Splits repos into shards w/ 'plan_shards', claims each shard
+        for a new task and enqueues the tasks that won a claim as a group.
+
+        If 'sliced', repos larger than SLICE_MIN_BYTES are instead queried
+        in time slices, if 'func' declares a 'slice_column': a task per
+        window, then STITCH_TASK to combine them. The stitching task owns
+        the repo, so waiting on it waits for the whole repo.
+
+        Returns:
+            list[int]: repos that a new task was enqueued for.
+        """
+
+        estimates = self.estimatesm(func=func, repos=repos)
+        launched = []
+
+        if sliced and SLICE_MIN_BYTES > 0 and getattr(func, "slice_column", None):
+            windows = plan_windows()
+            large = [r for r, e in zip(repos, estimates) if e is not None and e > SLICE_MIN_BYTES]
+
+            for r in large:
+                task_id = str(uuid.uuid4())
+                if not self.claimm(func=func, repos=[r], task_id=task_id):
+                    continue
+
+                logging.warning(f"CACHE: {func.__name__} SLICING REPO {r} INTO {len(windows)} WINDOWS")
+                # the body is immutable: it reads the slices from the cache,
+                # not the header tasks' results.
+                chord(
+                    [func.s([r], window=w).set(queue="data", priority=priority) for w in windows],
+                    func.app.signature(STITCH_TASK, args=[[r], func.name, windows], immutable=True).set(
+                        queue="data", task_id=task_id, priority=priority
+                    ),
+                ).apply_async()
+                launched.append(r)
+
+            estimates = [e for r, e in zip(repos, estimates) if r not in large]
+            repos = [r for r in repos if r not in large]
+
+        shards = plan_shards(repos, estimates)
+
+        tasks = []
+        for shard in shards:
+            # other callers may be dispatching for the same data; only
+            # enqueue for the repos that this claim wins.
+            task_id = str(uuid.uuid4())
+            claimed = self.claimm(func=func, repos=shard, task_id=task_id)
+            if claimed:
+                tasks.append(func.s(claimed).set(queue="data", task_id=task_id, priority=priority))
+                launched.extend(claimed)
+
+        if tasks:
+            group(tasks).apply_async()
+
+        return launched
+
+    def dispatchm(self, func, repos, priority=None):
+        """Makes sure that some task is querying for each (func, repo)
+        that isn't in the cache, enqueueing 'func' only for the repos that
+        no live task owns. Requests for data that's already being queried
+        attach to the owning task instead of running the query again.
+
+        Large selections are split into shards (see 'plan_shards') that are
+        enqueued as a group and run in parallel across the data workers.
+        Very large repos are queried in time slices instead, see '_launchm'.
+        The returned IDs cover every shard, so the data is complete once
+        all of them have finished.
+
+        Args:
+            func (function): Query function (Celery task) used
+            repo (list[int]): list of repo_ids of repos
+            priority (int | None): priority of a new task, the queue's default if None.
+
+        Returns:
+            list[str]: IDs of the tasks, new or existing, querying for the missing repos.
+        """
+
+        missing = self.missingm(func=func, repos=repos)
+        if not missing:
+            return []
+
+        owners = self.get_ownersm(func=func, repos=missing)
+
+        # a repo is orphaned if no task owns it or its owner has finished,
+        # e.g. because the data was evicted or the owning task failed.
+        finished = {o for o in set(owners) if o is not None and AsyncResult(o).state in states.READY_STATES}
+        orphans = [r for r, o in zip(missing, owners) if o is None or o in finished]
+
+        if orphans:
+            for o in finished:
+                self.releasem(func=func, repos=[r for r, ro in zip(missing, owners) if ro == o], task_id=o)
+
+            claimed = self._launchm(func=func, repos=orphans, priority=priority, sliced=True)
+
+            if claimed:
+                logging.warning(f"CACHE: {func.__name__} DISPATCHED FOR REPOS {claimed}")
+
+            # repos whose claim was lost are owned by whoever won it.
+            owners = self.get_ownersm(func=func, repos=missing)
+
+        return list({o for o in owners if o is not None})
+
+    def grabm_wait(self, func, repos, columns=None, timeout=GRAB_TIMEOUT):
+        """Waits for data to be available for all repos and builds
+        aggregate DataFrame to return to callback.
+
+        While waiting, queries are re-dispatched for repos that are
+        missing from the cache but no longer owned by a running task,
+        so a failed query or an eviction can't leave the callback
+        waiting forever.
+
+        Args:
+            func (function): Query function (Celery task) used
+            repo (list[int]): list of repo_ids of repos
+            columns (list[str] | None): columns to read, all if None.
+            timeout (float): seconds to wait before giving up
+
+        Returns:
+            pd.DataFrame | None: Data, None if it wasn't available in time.
+        """
+
+        deadline = time.monotonic() + timeout
+
+        while True:
+            df = self.grabm(func=func, repos=repos, columns=columns)
+            if df is not None:
+                return df
+
+            self.dispatchm(func=func, repos=repos)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                missing = self.missingm(func=func, repos=repos)
+                logging.error(f"CACHE: {func.__name__} TIMED OUT AFTER {timeout}s, MISSING REPOS {missing}")
+                return None
+
+            self.wait_ready(func=func, repos=repos, timeout=min(READY_TIMEOUT, remaining))
+
+    def grabm(self, func, repos, columns=None):
         """Checks to see if data is ready using 'existsm'
         and builds aggregate DataFrame to return to callback.
 
         Args:
             func (function): Query function used
             repo (list[int]): list of repo_ids of repos
+            columns (list[str] | None): columns to read, all if None.
 
         Returns:
             pd.DataFrame | None: Data if all available.
@@ -214,16 +1573,30 @@ class CacheManager:
         if not ready:
             return None
 
-        # get all results from cache
-        dfs_from_cache = self.getm(func=func, repos=repos)
+        # reuse data this process has already decoded, if it's still current.
+        # data without a version predates versioning and is always fetched.
+        versions = self.versionsm(func=func, repos=repos)
+        cols = tuple(columns) if columns is not None else None
+        l1_keys = [(self._get_hash(func, r), v, cols) for r, v in zip(repos, versions)]
+        tables = [_l1.get(k) if k[1] is not None else None for k in l1_keys]
+
+        missed = [i for i, t in enumerate(tables) if t is None]
+        if missed:
+            # get remaining results from cache
+            dfs_from_cache = self.getm(func=func, repos=[repos[i] for i in missed], touch=False)
+
+            # data could have been evicted since 'existsm'
+            if any(bdf is None for bdf in dfs_from_cache):
+                return None
 
-        pd_dfs = []
-        for bdf in dfs_from_cache:
-            bbuff = io.BytesIO(bdf)
-            bbuff.seek(0)
-            df = pd.read_feather(bbuff)
-            pd_dfs.append(df)
+            # decode repos in parallel
+            decoded = _decode_pool.map(lambda bdf: deserialize_table(bdf, columns=columns), dfs_from_cache)
+            for i, t in zip(missed, decoded):
+                tables[i] = t
+                if l1_keys[i][1] is not None:
+                    _l1.put(l1_keys[i], t)
 
-        out_df = pd.concat(pd_dfs)
+        # build a single DataFrame
+        out_df = concat_tables(tables)
 
         return out_df
@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+
+class LocalCache:
+    """
+    Bounded, in-process LRU cache of decoded query data.
+
+    Sits in front of Redis so that callbacks re-rendering the same data
+    (e.g. a changed interval radio button) don't re-download and re-decode it.
+    Values are Arrow Tables: they're immutable, so one can be handed to
+    every callback in the process without a callback's edits leaking
+    into another's data.
+
+    Keys carry the data version that 'CacheManager.setm' writes, so
+    refreshed data is never served from here; stale versions simply
+    age out of the LRU order.
+
+    Attributes
+    ----------
+        max_bytes : int
+            Budget for the sum of 'nbytes' of held values. 0 disables the cache.
+
+    Methods
+    -------
+        get(key):
+            Returns the value at key, None if not held. Marks it most recently used.
+
+        put(key, value):
+            Holds value at key, evicting least recently used values to fit.
+
+        clear():
+            Drops all held values.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        size = value.nbytes
+
+        # disabled, or wouldn't fit even in an empty cache
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+
+            self._data[key] = value
+            self._nbytes += size
+
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._nbytes = 0
@@ -0,0 +1,77 @@
+"""
+Process-wide Redis connection pools.
+
+Clients built on these pools are cheap to create per call: they
+borrow an open connection from the pool instead of connecting, and
+the pools are safe to share across threads (and reset after a fork).
+
+Idle connections are health-checked with a PING only when they've been
+unused for HEALTH_CHECK_INTERVAL seconds, rather than on every call.
+"""
+
+import os
+import redis
+
+# most connections a pool opens; callers wait up to POOL_TIMEOUT for one to free up.
+MAX_CONNECTIONS = int(os.getenv("REDIS_POOL_MAX_CONNECTIONS", "50"))
+POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "20"))
+
+# seconds a connection may sit idle before it's checked on next use.
+HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+
+# pools by (host, port, decode_responses)
+_pools = {}
+
+
+def _get_pool(host, port, decode_responses):
+    key = (host, str(port), decode_responses)
+    if key not in _pools:
+        # dict assignment is atomic; a race only builds a spare, unused pool.
+        _pools.setdefault(
+            key,
+            redis.BlockingConnectionPool(
+                host=host,
+                port=port,
+                password=os.getenv("REDIS_PASSWORD", ""),
+                decode_responses=decode_responses,
+                max_connections=MAX_CONNECTIONS,
+                timeout=POOL_TIMEOUT,
+                health_check_interval=HEALTH_CHECK_INTERVAL,
+            ),
+        )
+    return _pools[key]
+
+
+def cache_client(decode_responses=False):
+    """Returns a client for the results cache, 'redis-cache'.
+
+    Args:
+        decode_responses (bool): return str instead of bytes.
+
+    Returns:
+        redis.StrictRedis: client on the shared pool
+    """
+    # openshift, compose will reconcile the 'redis' naming via the dns
+    pool = _get_pool(
+        host=os.getenv("REDIS_SERVICE_HOST", "redis-cache"),
+        port=os.getenv("REDIS_SERVICE_PORT", "6379"),
+        decode_responses=decode_responses,
+    )
+    return redis.StrictRedis(connection_pool=pool)
+
+
+def users_client(decode_responses=False):
+    """Returns a client for the user sessions cache, 'redis-users'.
+
+    Args:
+        decode_responses (bool): return str instead of bytes.
+
+    Returns:
+        redis.StrictRedis: client on the shared pool
+    """
+    pool = _get_pool(
+        host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
+        port=6379,
+        decode_responses=decode_responses,
+    )
+    return redis.StrictRedis(connection_pool=pool)
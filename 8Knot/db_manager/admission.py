@@ -0,0 +1,213 @@
+"""
+Cross-process admission control for queries against the Augur database.
+
+Every app and worker process takes a slot from a Redis-backed semaphore
+before running a query, so a burst of dispatched tasks can't open more
+concurrent queries than the database handles well. There's one global
+semaphore and an optional one per query type.
+
+Interactive queries, that a page or the app's startup waits on, have
+their own small lane instead: they don't queue behind background query
+tasks, and give up after a short wait.
+
+Waiters are served first come, first served: each takes a ticket once
+and holds a slot when it's among the 'limit' oldest tickets. Slots are
+leases that the holder renews while its query runs, so a crashed
+process' slots free up after SLOT_TTL seconds.
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+import redis
+from cache_manager.redis_pools import cache_client
+
+# most queries running at once across all processes. 0 means no limit.
+# can be set per query type w/ e.g. AUGUR_MAX_QUERIES_COMMITS.
+MAX_QUERIES = int(os.getenv("AUGUR_MAX_QUERIES", "8"))
+
+# seconds a slot or a place in line is kept without being renewed.
+SLOT_TTL = int(os.getenv("AUGUR_SLOT_TTL", "60"))
+
+# seconds between checks while waiting for a slot.
+SLOT_POLL = float(os.getenv("AUGUR_SLOT_POLL", "0.5"))
+
+# seconds to wait for a slot before giving up.
+SLOT_WAIT = float(os.getenv("AUGUR_SLOT_WAIT", "3600"))
+
+# most interactive queries running at once, apart from the global limit, and
+# seconds they wait for a slot. 0 means no limit.
+INTERACTIVE_QUERIES = int(os.getenv("AUGUR_MAX_QUERIES_INTERACTIVE", "4"))
+INTERACTIVE_WAIT = float(os.getenv("AUGUR_SLOT_WAIT_INTERACTIVE", "30"))
+
+# drops expired holders and waiters, takes a ticket if the caller
+# doesn't have one, and returns whether the caller's ticket holds a slot.
+ACQUIRE_SCRIPT = """
+local expired = redis.call('zrangebyscore', KEYS[2], '-inf', ARGV[3])
+for _, member in ipairs(expired) do
+    redis.call('zrem', KEYS[1], member)
+    redis.call('zrem', KEYS[2], member)
+end
+if not redis.call('zscore', KEYS[1], ARGV[1]) then
+    redis.call('zadd', KEYS[1], redis.call('incr', KEYS[3]), ARGV[1])
+end
+redis.call('zadd', KEYS[2], ARGV[4], ARGV[1])
+if redis.call('zrank', KEYS[1], ARGV[1]) < tonumber(ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+
+def query_limit(query_name=None):
+    """Gets the most queries of a type that may run at once.
+
+    Args:
+        query_name (str | None): type of query, e.g. "COMMITS". None for the global limit.
+
+    Returns:
+        int: limit, 0 if unlimited.
+    """
+    if query_name is None:
+        return MAX_QUERIES
+    return int(os.getenv(f"AUGUR_MAX_QUERIES_{query_name.upper()}", "0"))
+
+
+class Semaphore:
+    """
+    Fair, distributed counting semaphore on Redis.
+
+    Attributes
+    ----------
+        name : str
+            Name of the semaphore, shared by every process that uses it.
+
+        limit : int
+            Most holders at once.
+
+    Methods
+    -------
+        acquire(timeout):
+            Waits in line for a slot. Returns whether one was acquired.
+
+        renew():
+            Extends the lease on the held slot. Returns False if it had already expired.
+
+        release():
+            Gives up the slot, or the place in line.
+    """
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.id = str(uuid.uuid4())
+        self._redis = cache_client()
+        self._keys = [f"db_slots:{name}", f"db_slots:{name}:expiry", f"db_slots:{name}:tickets"]
+
+    def acquire(self, timeout=SLOT_WAIT):
+        acquire = self._redis.register_script(ACQUIRE_SCRIPT)
+        deadline = time.monotonic() + timeout
+
+        while True:
+            now = time.time()
+            if acquire(keys=self._keys, args=[self.id, self.limit, now, now + SLOT_TTL]):
+                return True
+
+            if time.monotonic() > deadline:
+                self.release()
+                return False
+
+            time.sleep(SLOT_POLL)
+
+    def renew(self):
+        # 'ch' counts updated members, so 0 means the lease had lapsed and was reaped.
+        renewed = self._redis.zadd(self._keys[1], {self.id: time.time() + SLOT_TTL}, xx=True, ch=True)
+        if not renewed:
+            logging.error(f"AUGUR: QUERY SLOT {self.name} EXPIRED BEFORE IT WAS RENEWED, QUERY RUNS W/O IT")
+        return bool(renewed)
+
+    def release(self):
+        with self._redis.pipeline() as pipe:
+            pipe.zrem(self._keys[0], self.id)
+            pipe.zrem(self._keys[1], self.id)
+            pipe.execute()
+
+
+@contextmanager
+def query_slot(query_name=None, interactive=False):
+    """Holds a slot of the global semaphore, and of the query type's
+    if it has a limit, for the duration of the block.
+
+    The type's slot is taken first, so queries waiting on a busy type
+    don't hold global slots that other types could use.
+
+    Interactive queries hold a slot of the "INTERACTIVE" semaphore
+    instead, and wait at most INTERACTIVE_WAIT seconds for it.
+
+    If Redis can't be reached, queries run without admission control.
+
+    Args:
+        query_name (str | None): type of query, e.g. "COMMITS".
+        interactive (bool): whether a page or the app's startup waits on the query.
+
+    Raises:
+        TimeoutError: a slot didn't free up within SLOT_WAIT (or INTERACTIVE_WAIT) seconds.
+    """
+    if interactive:
+        names, limits, wait = ["INTERACTIVE"], [INTERACTIVE_QUERIES], INTERACTIVE_WAIT
+    elif query_name is not None:
+        names, limits, wait = [query_name, "GLOBAL"], [query_limit(query_name), query_limit()], SLOT_WAIT
+    else:
+        names, limits, wait = ["GLOBAL"], [query_limit()], SLOT_WAIT
+
+    if all(limit <= 0 for limit in limits):
+        yield
+        return
+
+    held = []
+    stop = threading.Event()
+
+    def keep_alive():
+        while not stop.wait(SLOT_TTL / 3):
+            for s in list(held):
+                try:
+                    # a lapsed slot is gone; it's neither renewed nor released again.
+                    if not s.renew():
+                        held.remove(s)
+                except redis.exceptions.ConnectionError:
+                    logging.warning(f"AUGUR: COULDN'T RENEW QUERY SLOT {s.name}")
+
+    # renews slots from when they're taken, including while waiting for the next one.
+    renewer = threading.Thread(target=keep_alive, name="augur-slot", daemon=True)
+    renewer.start()
+
+    try:
+        for name, limit in zip(names, limits):
+            if limit <= 0:
+                continue
+
+            s = Semaphore(name=name, limit=limit)
+            try:
+                acquired = s.acquire(timeout=wait)
+            except redis.exceptions.ConnectionError:
+                logging.warning(f"AUGUR: COULDN'T REACH REDIS, RUNNING QUERY W/O SLOT {name}")
+                continue
+
+            if not acquired:
+                raise TimeoutError(f"AUGUR: NO QUERY SLOT {name} FREED UP IN {wait}s")
+            held.append(s)
+
+        yield
+    finally:
+        stop.set()
+        renewer.join()
+
+        for s in held:
+            try:
+                s.release()
+            except redis.exceptions.ConnectionError:
+                # the slot expires on its own
+                logging.warning(f"AUGUR: COULDN'T RELEASE QUERY SLOT {s.name}")
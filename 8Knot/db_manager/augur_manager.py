@@ -3,12 +3,104 @@
 """
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 import sqlalchemy as salc
 import os
+import re
+import time
+import hashlib
+import threading
 import logging
 import sys
 import requests
+import pyarrow.csv as pa_csv
 from sqlalchemy.exc import SQLAlchemyError
+from db_manager.admission import query_slot
+
+# rows fetched from the server-side cursor at a time when streaming results.
+STREAM_BATCH_ROWS = int(os.getenv("AUGUR_STREAM_BATCH_ROWS", "50000"))
+
+# whether queries that declare a schema are extracted w/ COPY, and the
+# bytes of CSV parsed into each batch when they are.
+COPY_EXTRACTION = os.getenv("AUGUR_COPY_EXTRACTION", "True") == "True"
+COPY_BLOCK_BYTES = int(os.getenv("AUGUR_COPY_BLOCK_BYTES", str(16 * 1024 * 1024)))
+
+# whether queries w/ params are prepared per connection. Off by default: behind
+# a connection pooler in transaction mode (e.g. pgbouncer), as Augur is often
+# deployed, sessions aren't kept and prepared statements go missing. If they do,
+# the process stops preparing and runs the query again unprepared.
+PREPARE_STATEMENTS = os.getenv("AUGUR_PREPARE_STATEMENTS", "False") == "True"
+
+# SQLSTATEs of a prepared statement that doesn't exist, or already exists,
+# on the session a statement ran on.
+PREPARED_STATEMENT_ERRORS = {"26000", "42P05"}
+
+# set once prepared statements have gone missing in this process, see 'run_query'.
+_prepare_failed = threading.Event()
+
+# named bind parameters in query strings, e.g. ':repo_ids' but not '::bigint[]'
+BIND_PARAM = re.compile(r"(?<![:\w]):(\w+)")
+
+# seconds a query may run before the database cancels it. 0 means no limit.
+# can be set per query type w/ e.g. AUGUR_STATEMENT_TIMEOUT_COMMITS.
+STATEMENT_TIMEOUT = int(os.getenv("AUGUR_STATEMENT_TIMEOUT", "1800"))
+
+# SQLSTATE of a statement cancelled by its timeout
+QUERY_CANCELED = "57014"
+
+# connection pool of the process' engine. Size these to fit the database's
+# (or pgbouncer's) connection limit across all app and worker processes.
+POOL_SIZE = int(os.getenv("AUGUR_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("AUGUR_POOL_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = int(os.getenv("AUGUR_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("AUGUR_POOL_RECYCLE", "1800"))
+
+# ping connections on every checkout. Off by default, so a connection that
+# was dropped is only found out when a query on it fails: SQLAlchemy then
+# invalidates the whole pool and the next checkout opens a new connection.
+# Query tasks are retried by Celery; a failed callback query isn't retried.
+# Connections older than POOL_RECYCLE seconds are replaced on checkout either way.
+POOL_PRE_PING = os.getenv("AUGUR_POOL_PRE_PING", "False") == "True"
+
+# engines by connection string, shared by every AugurManager in the process.
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def dispose_engines():
+    """Closes the connections of the process' engines and forgets them."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+def _reset_engines_in_child():
+    """
+    (private)
+    Forgets the engines a forked process inherited, w/o closing their
+    connections, which still belong to the parent. The child creates
+    its own engine on first use.
+
+    Only the forking thread survives a fork, so the lock may have been
+    held by a thread that's gone; it's replaced rather than taken.
+    'dispose(close=False)' swaps in an empty pool w/o locking the old one,
+    so AugurManagers that still hold an inherited engine connect anew.
+    """
+    global _engines_lock
+    _engines_lock = threading.Lock()
+
+    for engine in list(_engines.values()):
+        engine.dispose(close=False)
+    _engines.clear()
+
+
+# a forked process (e.g. a Celery pool worker) must not use its parent's connections.
+os.register_at_fork(after_in_child=_reset_engines_in_child)
+
+
+class QueryTimeout(Exception):
+    """A query ran past its statement timeout and was cancelled by the database."""
 
 
 class AugurManager:
@@ -45,11 +137,21 @@ class AugurManager:
     --------
         get_engine():
             Connects to Augur databse with supplied credentials and
-            returns engine object.
+            returns engine object. Shared by the process.
 
-        run_query(query_string):
+        run_query(query_string, params, query_name, interactive):
             Runs a SQL-query against Augur database and returns resulting
-            Pandas dataframe.
+            Pandas dataframe. Queries w/ params can be prepared once per connection.
+            Waits for a query slot and is cancelled after the statement timeout.
+
+        stream_query(query_string, batch_rows, schema, params, query_name):
+            Runs a SQL-query against Augur database w/ a server-side cursor,
+            or w/ COPY if a schema is declared, and yields the results as
+            Arrow record batches.
+
+        stream_query_by_repo(query_string, repos, id_column, schema, params, query_name):
+            Runs a SQL-query whose results are ordered by repo and yields
+            each repo's results as a Pandas dataframe.
     """
 
     def __init__(self, handles_oauth=False):
@@ -92,7 +194,13 @@ class AugurManager:
 
     def get_engine(self):
         """
-        Creates _engine.Engine object connected to our Augur database.
+        Gets the process' _engine.Engine object connected to our Augur database,
+        creating it on first use.
+
+        The engine and its connection pool are shared by every AugurManager
+        in the process, so query tasks and callbacks reuse open connections.
+        The connection is tested when the engine is created, and pooled
+        connections are only pinged on checkout if POOL_PRE_PING is set.
 
         Returns:
         --------
@@ -107,37 +215,79 @@ class AugurManager:
             self.user, self.password, self.host, self.port, self.database
         )
 
-        engine = salc.create_engine(
-            database_connection_string,
-            connect_args={"options": "-csearch_path={}".format(self.schema)},
-            pool_pre_ping=True,
-        )
-
-        # verify that engine works
-        try:
-            # context managed connect, closes automatically
-            with engine.connect() as conn:
-                logging.warning("AUGUR: Connection to DB succeeded")
-
-            self.engine = engine
-
-        except SQLAlchemyError as err:
-            logging.error(f"AUGUR: DB couldn't connect: {err.__cause__}")
-            raise SQLAlchemyError(err)
-
+        with _engines_lock:
+            engine = _engines.get((database_connection_string, self.schema))
+            if engine is None:
+                engine = salc.create_engine(
+                    database_connection_string,
+                    connect_args={"options": "-csearch_path={}".format(self.schema)},
+                    pool_size=POOL_SIZE,
+                    max_overflow=POOL_MAX_OVERFLOW,
+                    pool_timeout=POOL_TIMEOUT,
+                    pool_recycle=POOL_RECYCLE,
+                    pool_pre_ping=POOL_PRE_PING,
+                )
+
+                # statements prepared on a connection are gone once it's replaced.
+                salc.event.listen(engine, "connect", lambda dbapi_conn, record: record.info.pop("prepared", None))
+
+                # verify that engine works
+                try:
+                    # context managed connect, closes automatically
+                    with engine.connect() as conn:
+                        logging.warning("AUGUR: Connection to DB succeeded")
+
+                except SQLAlchemyError as err:
+                    logging.error(f"AUGUR: DB couldn't connect: {err.__cause__}")
+                    raise SQLAlchemyError(err)
+
+                _engines[(database_connection_string, self.schema)] = engine
+
+        self.engine = engine
         return engine
 
-    def run_query(self, query_string: str) -> pd.DataFrame:
+    def _get_statement_timeout(self, query_name: str = None) -> int:
+        """
+        (private)
+        Seconds the query type's statements may run, 0 if unlimited.
+        """
+        if query_name is None:
+            return STATEMENT_TIMEOUT
+        return int(os.getenv(f"AUGUR_STATEMENT_TIMEOUT_{query_name.upper()}", STATEMENT_TIMEOUT))
+
+    def run_query(
+        self, query_string: str, params: dict = None, query_name: str = None, interactive: bool = False
+    ) -> pd.DataFrame:
         """
         Runs SQL query against our Augur database.
 
+        Waits for a query slot first (see 'db_manager.admission'), and the
+        database cancels the query after the type's statement timeout.
+        Queries a page waits on should be 'interactive', so they take a slot
+        apart from the background query tasks and don't wait long for it.
+
+        Values in 'params' are bound to the query's named parameters,
+        e.g. {"repo_ids": [1, 2]} to 'WHERE repo_id = ANY(:repo_ids)',
+        instead of being written into the SQL. If PREPARE_STATEMENTS is set,
+        the query is then prepared once per pooled connection, so Postgres
+        plans it once and reuses the plan for every repo selection.
+
         Args:
         -----
             query_string (str): SQL query to run.
+            params (dict | None): values of the query's named parameters.
+            query_name (str | None): type of query, for its concurrency limit and timeout.
+            interactive (bool): whether the query is waited on interactively, see 'query_slot'.
 
         Returns:
         --------
             pd.DataFrame: Results from SQL query.
+
+        Raises:
+        -------
+            TimeoutError: no query slot freed up in time, i.e. the database is busy.
+            QueryTimeout: the database cancelled the query after the statement timeout.
+            Exception: "DB Read Failure" if the query failed otherwise.
         """
         if self.engine is None:
             logging.critical("No engine- please use 'get_engine' method to create engine.")
@@ -147,10 +297,30 @@ class AugurManager:
 
         query = salc.sql.text(query_string)
 
+        timeout = self._get_statement_timeout(query_name)
+        prepare = params is not None and PREPARE_STATEMENTS and not _prepare_failed.is_set()
+
         try:
-            with self.engine.connect() as conn:
-                result_df = pd.read_sql(query, con=conn)
-        except:
+            with query_slot(query_name, interactive=interactive), self.engine.connect() as conn:
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout * 1000}")
+                if not prepare:
+                    result_df = pd.read_sql(query, con=conn, params=params)
+                else:
+                    result_df = pd.read_sql(self._prepare(conn, query_string), con=conn, params=params)
+        except SQLAlchemyError as e:
+            pgcode = getattr(getattr(e, "orig", None), "pgcode", None)
+            if pgcode == QUERY_CANCELED:
+                raise QueryTimeout(f"AUGUR: QUERY CANCELLED AFTER {timeout}s")
+            if prepare and pgcode in PREPARED_STATEMENT_ERRORS:
+                # sessions aren't kept, e.g. behind a transaction pooler; stop preparing.
+                logging.error("AUGUR: PREPARED STATEMENTS AREN'T KEPT BY THE DB SESSION, RUNNING QUERIES UNPREPARED")
+                _prepare_failed.set()
+                return self.run_query(query_string, params, query_name, interactive)
+            raise Exception("DB Read Failure")
+        except (TimeoutError, QueryTimeout):
+            # no query slot freed up in time; the database is busy, not failing.
+            raise
+        except Exception:
             raise Exception("DB Read Failure")
 
         result_df = result_df.reset_index()
@@ -158,6 +328,306 @@ class AugurManager:
 
         return result_df
 
+    def _prepare(self, conn, query_string: str):
+        """
+        (private)
+        Prepares the query on the connection, if it isn't already,
+        and returns the statement that executes it w/ bound parameters.
+        """
+        names = list(dict.fromkeys(BIND_PARAM.findall(query_string)))
+        statement = "augur_" + hashlib.md5(query_string.encode("utf-8")).hexdigest()
+
+        prepared = conn.info.setdefault("prepared", set())
+        if statement not in prepared:
+            # Postgres infers the parameters' types, e.g. bigint[] for 'repo_id = ANY($1)'
+            positional = BIND_PARAM.sub(lambda m: f"${names.index(m.group(1)) + 1}", query_string)
+            conn.exec_driver_sql(f"PREPARE {statement} AS {positional}")
+            prepared.add(statement)
+
+        return salc.sql.text(f"EXECUTE {statement}({', '.join(':' + n for n in names)})")
+
+    def stream_query(
+        self,
+        query_string: str,
+        batch_rows: int = STREAM_BATCH_ROWS,
+        schema: pa.Schema = None,
+        params: dict = None,
+        query_name: str = None,
+    ):
+        """
+        Runs SQL query against our Augur database and yields the results in
+        batches, so memory use scales with the batch size, not the result size.
+        A query slot is held, and the statement timeout applies, as in 'run_query'.
+
+        If a 'schema' is declared for the query's columns (and COPY_EXTRACTION
+        is on), results are extracted with COPY and parsed straight into those
+        Arrow types. Otherwise a server-side cursor fetches 'batch_rows' rows
+        at a time and types are inferred.
+
+        Values in 'params' are bound to the query's named parameters, see
+        'run_query'. Cursors and COPY can't run prepared statements, so these
+        queries are planned per run.
+
+        Always yields at least one batch, which is empty if there are no rows.
+        Logs the rows extracted per second by either path, for comparison.
+
+        Args:
+        -----
+            query_string (str): SQL query to run.
+            batch_rows (int): most rows per batch, for the cursor path.
+            schema (pa.Schema | None): types of the query's columns, for the COPY path.
+            params (dict | None): values of the query's named parameters.
+            query_name (str | None): type of query, see 'run_query'.
+
+        Yields:
+        --------
+            pa.RecordBatch: Results from SQL query.
+        """
+        if self.engine is None:
+            logging.critical("No engine- please use 'get_engine' method to create engine.")
+            return
+
+        timeout = self._get_statement_timeout(query_name)
+        if schema is not None and COPY_EXTRACTION:
+            path, batches = "COPY", self._copy_batches(query_string, schema, params or {}, timeout)
+        else:
+            path, batches = "CURSOR", self._cursor_batches(query_string, batch_rows, params or {}, timeout)
+
+        with query_slot(query_name):
+            start = time.perf_counter()
+            rows = 0
+            for batch in batches:
+                rows += batch.num_rows
+                yield batch
+
+        seconds = time.perf_counter() - start
+        logging.warning(
+            f"AUGUR: {path} EXTRACTED {rows} ROWS IN {seconds:.2f}s ({rows / max(seconds, 1e-9):.0f} ROWS/s)"
+        )
+
+    def _cursor_batches(self, query_string: str, batch_rows: int, params: dict, timeout: int):
+        """
+        (private)
+        Fetches results w/ a server-side cursor, inferring Arrow types per batch.
+        """
+        query = salc.sql.text(query_string)
+
+        try:
+            with self.engine.connect() as conn:
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout * 1000}")
+                result = conn.execution_options(stream_results=True, max_row_buffer=batch_rows).execute(query, params)
+                names = list(result.keys())
+
+                empty = True
+                for rows in result.partitions(batch_rows):
+                    empty = False
+                    columns = list(zip(*rows))
+                    yield pa.RecordBatch.from_arrays([pa.array(c, from_pandas=True) for c in columns], names=names)
+
+                if empty:
+                    yield pa.RecordBatch.from_arrays([pa.array([]) for _ in names], names=names)
+        except SQLAlchemyError as e:
+            if getattr(getattr(e, "orig", None), "pgcode", None) == QUERY_CANCELED:
+                raise QueryTimeout(f"AUGUR: QUERY CANCELLED AFTER {timeout}s")
+            raise Exception("DB Read Failure")
+
+    def _copy_batches(self, query_string: str, schema: pa.Schema, params: dict, timeout: int):
+        """
+        (private)
+        Extracts results w/ 'COPY (query) TO STDOUT' in CSV format and parses
+        them into the columns and types of 'schema' as they arrive.
+
+        COPY writes into a pipe from a separate thread while Arrow's streaming
+        CSV reader parses the other end, so the CSV is never held in full.
+        Timestamps are rendered in UTC; naive ones are taken to be UTC, like
+        pd.to_datetime(..., utc=True) does.
+        """
+
+        def column(field):
+            if pa.types.is_timestamp(field.type):
+                return f'q."{field.name}"::{"timestamptz" if field.type.tz else "timestamp"} AS "{field.name}"'
+            return f'q."{field.name}"'
+
+        # COPY can't take parameters, so psycopg2 writes their values into it.
+        query_string = BIND_PARAM.sub(r"%(\1)s", query_string.replace("%", "%%"))
+
+        # the subquery's ORDER BY is kept by the plain projection around it.
+        copy_sql = (
+            f"COPY (SELECT {', '.join(column(f) for f in schema)} FROM ({query_string}) AS q) "
+            "TO STDOUT WITH (FORMAT csv, HEADER true)"
+        )
+
+        read_fd, write_fd = os.pipe()
+        reader = os.fdopen(read_fd, "rb")
+        writer = os.fdopen(write_fd, "wb")
+        failure = []
+
+        conn = self.engine.raw_connection()
+
+        def copy():
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SET LOCAL TIME ZONE 'UTC'")
+                    cur.execute(f"SET LOCAL statement_timeout = {timeout * 1000}")
+                    cur.copy_expert(cur.mogrify(copy_sql, params).decode("utf-8"), writer)
+            except Exception as e:
+                failure.append(e)
+            finally:
+                writer.close()
+
+        copier = threading.Thread(target=copy, name="augur-copy", daemon=True)
+        copier.start()
+
+        try:
+            stream = pa_csv.open_csv(
+                reader,
+                read_options=pa_csv.ReadOptions(block_size=COPY_BLOCK_BYTES),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=schema,
+                    include_columns=schema.names,
+                    strings_can_be_null=True,
+                    # COPY writes NULL unquoted and empty strings quoted
+                    quoted_strings_can_be_null=False,
+                    true_values=["t"],
+                    false_values=["f"],
+                ),
+            )
+
+            empty = True
+            for batch in stream:
+                empty = False
+                yield batch
+
+            if empty:
+                yield pa.RecordBatch.from_pylist([], schema=schema)
+        except pa.ArrowInvalid as e:
+            # COPY failing closes the pipe early; report its error instead.
+            if not failure:
+                raise Exception(f"DB Read Failure: {e}")
+        finally:
+            # unblocks the copy if we stopped reading early
+            reader.close()
+            copier.join()
+            # the transaction only read; end it and return the connection.
+            conn.rollback()
+            conn.close()
+
+        if failure:
+            if getattr(failure[0], "pgcode", None) == QUERY_CANCELED:
+                raise QueryTimeout(f"AUGUR: QUERY CANCELLED AFTER {timeout}s")
+            raise Exception(f"DB Read Failure: {failure[0]}")
+
+    def stream_query_by_repo(
+        self,
+        query_string: str,
+        repos,
+        id_column: str = "id",
+        schema: pa.Schema = None,
+        params: dict = None,
+        query_name: str = None,
+    ):
+        """
+        Streams a SQL query whose results are ORDER BY 'id_column' and yields
+        each repo's rows once they've all been read. At most one repo's rows
+        and one batch are held in memory.
+
+        Repos in 'repos' that have no rows are yielded last, as empty dataframes.
+
+        Args:
+        -----
+            query_string (str): SQL query to run, ordered by 'id_column'.
+            repos ([int]): repo_ids the query is run for.
+            id_column (str): column holding the repo_id.
+            schema (pa.Schema | None): types of the query's columns, see 'stream_query'.
+            params (dict | None): values of the query's named parameters, see 'stream_query'.
+            query_name (str | None): type of query, see 'run_query'.
+
+        Yields:
+        --------
+            (int, pd.DataFrame): repo_id and its results from SQL query.
+        """
+
+        def to_frame(pieces):
+            # batches can infer different types for all-null columns; pandas reconciles them.
+            return pd.concat([p.to_pandas() for p in pieces], ignore_index=True)
+
+        done = set()
+        current = None
+        pieces = []
+        names = []
+
+        for batch in self.stream_query(query_string, schema=schema, params=params, query_name=query_name):
+            names = batch.schema.names
+            if batch.num_rows == 0:
+                continue
+
+            # boundaries between runs of rows of the same repo
+            ids = batch.column(names.index(id_column)).to_numpy(zero_copy_only=False)
+            starts = [0, *(np.flatnonzero(ids[1:] != ids[:-1]) + 1)]
+            ends = [*starts[1:], len(ids)]
+
+            for start, end in zip(starts, ends):
+                rid = int(ids[start])
+                if rid != current:
+                    if current is not None:
+                        yield current, to_frame(pieces)
+                        done.add(current)
+                    if rid in done:
+                        raise ValueError(f"AUGUR: query results not ordered by {id_column}")
+                    current, pieces = rid, []
+
+                # zero-copy view of the run
+                pieces.append(batch.slice(start, end - start))
+
+        if current is not None:
+            yield current, to_frame(pieces)
+            done.add(current)
+
+        for r in repos:
+            if r not in done:
+                yield r, pd.DataFrame(columns=names)
+
+    def window_query(self, query_string: str, column: str, window, params: dict = None):
+        """
+        Restricts a query to the rows whose 'column' falls in a time window,
+        so one repo's query can be split into slices that run in parallel.
+
+        The filter is applied to the query's output column; Postgres pushes
+        it down into the query where it can. Rows w/o a value in 'column'
+        fall in the window w/ an open start, so every row is in one window.
+
+        Args:
+        -----
+            query_string (str): SQL query to restrict.
+            column (str): name of a date/time column in the query's results.
+            window ([str | None, str | None]): start (inclusive) and end (exclusive)
+                of the window, e.g. "2021-01-01". None leaves that side open.
+            params (dict | None): values of the query's named parameters.
+
+        Returns:
+        --------
+            (str, dict): restricted query and its parameters.
+        """
+        start, end = window
+        params = dict(params or {})
+
+        if start is None and end is None:
+            return query_string, params
+
+        bounds = []
+        if start is not None:
+            bounds.append(f'w."{column}" >= :window_start')
+            params["window_start"] = start
+        if end is not None:
+            bounds.append(f'w."{column}" < :window_end')
+            params["window_end"] = end
+
+        # NULL compares as unknown, so the first window keeps those rows explicitly.
+        if start is None:
+            bounds = [f'(w."{column}" IS NULL OR {bounds[0]})']
+
+        return f"SELECT * FROM ({query_string}) AS w WHERE {' AND '.join(bounds)}", params
+
     def multiselect_startup(self):
         logging.warning(f"MULTISELECT_STARTUP")
 
@@ -172,8 +642,8 @@ class AugurManager:
                         ON rg.repo_group_id = r.repo_group_id
                         ORDER BY rg.rg_name"""
 
-        # query for search bar entry generation
-        df_search_bar = self.run_query(query_string)
+        # query for search bar entry generation. the app waits on it to start.
+        df_search_bar = self.run_query(query_string, interactive=True)
         logging.warning(f"MULTISELECT_QUERY")
 
         # create a list of dictionaries for the MultiSelect dropdown
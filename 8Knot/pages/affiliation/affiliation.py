@@ -10,9 +10,14 @@ from .visualizations.company_associated_activity import gc_company_associated_ac
 from .visualizations.company_core_contributors import gc_company_core_contributors
 from .visualizations.commit_domains import gc_commit_domains
 
+# import the queries the visualizations read
+from queries.company_query import company_query as cmq
+from queries.commits_query import commits_query as cq
+
 warnings.filterwarnings("ignore")
 
-dash.register_page(__name__, path="/affiliation")
+# queries that the visualizations on this page read, dispatched on visit.
+dash.register_page(__name__, path="/affiliation", queries=[cmq, cq])
 
 layout = dbc.Container(
     [
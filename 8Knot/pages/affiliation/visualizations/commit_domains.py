@@ -8,10 +8,11 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import color_seq
+from pages.utils.time_utils import sort_by_date, filter_by_date
 from queries.commits_query import commits_query as cq
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 import datetime as dt
 
@@ -135,10 +136,9 @@ def toggle_popover(n, is_open):
 def commit_domains_graph(repolist, num, start_date, end_date):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=cq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=cq, repos=repolist)
+    df = cache.grabm_wait(func=cq, repos=repolist, columns=["author_timestamp", "author_email"])
+    if df is None:
+        return timeout_graph
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -160,17 +160,11 @@ def commit_domains_graph(repolist, num, start_date, end_date):
 def process_data(df: pd.DataFrame, num, start_date, end_date):
     # TODO: create docstring
 
-    # convert to datetime objects rather than strings
-    df["author_timestamp"] = pd.to_datetime(df["author_timestamp"], utc=True)
-
     # order values chronologically by author_timestamp date earliest to latest
-    df = df.sort_values(by="author_timestamp", axis=0, ascending=True)
+    df = sort_by_date(df, "author_timestamp")
 
     # filter values based on date picker
-    if start_date is not None:
-        df = df[df.author_timestamp >= start_date]
-    if end_date is not None:
-        df = df[df.author_timestamp <= end_date]
+    df = filter_by_date(df, "author_timestamp", start_date, end_date)
 
     # creates list of emails for each contribution and flattens list result
     emails = df.author_email.tolist()
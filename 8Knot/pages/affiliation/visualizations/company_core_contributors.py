@@ -8,10 +8,11 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import color_seq
+from pages.utils.time_utils import sort_by_date, filter_by_date
 from queries.company_query import company_query as cmq
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 import datetime as dt
 
@@ -151,10 +152,9 @@ def toggle_popover(n, is_open):
 def compay_associated_activity_graph(repolist, contributions, contributors, start_date, end_date):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=cmq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=cmq, repos=repolist)
+    df = cache.grabm_wait(func=cmq, repos=repolist, columns=["created", "cntrb_id", "email_list"])
+    if df is None:
+        return timeout_graph
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -174,17 +174,11 @@ def compay_associated_activity_graph(repolist, contributions, contributors, star
 
 
 def process_data(df: pd.DataFrame, contributions, contributors, start_date, end_date):
-    # convert to datetime objects rather than strings
-    df["created"] = pd.to_datetime(df["created"], utc=True)
-
     # order values chronologically by COLUMN_TO_SORT_BY date
-    df = df.sort_values(by="created", axis=0, ascending=True)
+    df = sort_by_date(df, "created")
 
     # filter values based on date picker
-    if start_date is not None:
-        df = df[df.created >= start_date]
-    if end_date is not None:
-        df = df[df.created <= end_date]
+    df = filter_by_date(df, "created", start_date, end_date)
 
     # groups contributions by countributor id and counts, created column now hold the number
     # of contributions for its respective contributor
@@ -7,9 +7,13 @@ import warnings
 from .visualizations.project_velocity import gc_project_velocity
 from .visualizations.contrib_importance_pie import gc_contrib_importance_pie
 
+# import the queries the visualizations read
+from queries.contributors_query import contributors_query as ctq
+
 warnings.filterwarnings("ignore")
 
-dash.register_page(__name__, path="/chaoss")
+# queries that the visualizations on this page read, dispatched on visit.
+dash.register_page(__name__, path="/chaoss", queries=[ctq])
 
 layout = dbc.Container(
     [
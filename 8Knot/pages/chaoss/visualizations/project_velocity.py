@@ -8,10 +8,12 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.time_utils import sort_by_date, filter_by_date
 from queries.contributors_query import contributors_query as ctq
+import queries.action_taxonomy as at
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 import datetime as dt
 import math
@@ -235,10 +237,9 @@ def project_velocity_graph(
 
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.grabm_wait(func=ctq, repos=repolist, columns=["created_at", "repo_name", "Action", "cntrb_id"])
+    if df is None:
+        return timeout_graph
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -268,17 +269,11 @@ def process_data(
     pr_c_weight,
 ):
 
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-
     # order values chronologically by COLUMN_TO_SORT_BY date
-    df = df.sort_values(by="created_at", axis=0, ascending=True)
+    df = sort_by_date(df, "created_at")
 
     # filter values based on date picker
-    if start_date is not None:
-        df = df[df.created_at >= start_date]
-    if end_date is not None:
-        df = df[df.created_at <= end_date]
+    df = filter_by_date(df, "created_at", start_date, end_date)
 
     # df to hold value of unique contributors for each repo
     df_cntrbs = pd.DataFrame(df.groupby("repo_name")["cntrb_id"].nunique()).rename(
@@ -296,16 +291,16 @@ def process_data(
     df_consolidated = pd.concat([df_actions, df_cntrbs], axis=1).reset_index()
 
     # log of commits and contribs
-    df_consolidated["log_num_commits"] = df_consolidated["Commit"].apply(math.log)
+    df_consolidated["log_num_commits"] = df_consolidated[at.COMMIT].apply(math.log)
     df_consolidated["log_num_contrib"] = df_consolidated["num_unique_contributors"].apply(math.log)
 
     # column to hold the weighted values of pr and issues actions summed together
     df_consolidated["prs_issues_actions_weighted"] = (
-        df_consolidated["Issue Opened"] * i_o_weight
-        + df_consolidated["Issue Closed"] * i_c_weight
-        + df_consolidated["PR Opened"] * pr_o_weight
-        + df_consolidated["PR Merged"] * pr_m_weight
-        + df_consolidated["PR Closed"] * pr_c_weight
+        df_consolidated[at.ISSUE_OPENED] * i_o_weight
+        + df_consolidated[at.ISSUE_CLOSED] * i_c_weight
+        + df_consolidated[at.PR_OPENED] * pr_o_weight
+        + df_consolidated[at.PR_MERGED] * pr_m_weight
+        + df_consolidated[at.PR_CLOSED] * pr_c_weight
     )
 
     # column for log value of pr and issue actions
@@ -329,7 +324,7 @@ def create_figure(df: pd.DataFrame, log):
         y=y_axis,
         color="repo_name",
         size="log_num_contrib",
-        hover_data=["repo_name", "Commit", "PR Opened", "Issue Opened", "num_unique_contributors"],
+        hover_data=["repo_name", at.COMMIT, at.PR_OPENED, at.ISSUE_OPENED, "num_unique_contributors"],
         color_discrete_sequence=color_seq,
     )
 
@@ -10,10 +10,14 @@ from .visualizations.review_cycle_duration import gc_review_cycle_duration
 from .visualizations.defect_resolution_duration import gc_defect_resolution_duration
 from.visualizations.change_requests_duration import gc_change_requests_duration
 
+# import the queries the visualizations read
+from queries.contributors_query import contributors_query as ctq
+from queries.prs_query import prs_query as prq
 
 warnings.filterwarnings("ignore")
 
-dash.register_page(__name__, path="/chaoss_1")
+# queries that the visualizations on this page read, dispatched on visit.
+dash.register_page(__name__, path="/chaoss_1", queries=[ctq, prq])
 
 layout = dbc.Container(
     [
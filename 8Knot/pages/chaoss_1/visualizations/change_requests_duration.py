@@ -8,11 +8,12 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.time_utils import sort_by_date, filter_by_date
 #from queries.change_requests_query import change_requests_query as crq
 from queries.prs_query import prs_query as prq
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 import datetime as dt
 import math
@@ -148,10 +149,9 @@ def toggle_popover(n, is_open):
 def change_requests_duration_graph(repolist, start_date, end_date):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=prq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=prq, repos=repolist)
+    df = cache.grabm_wait(func=prq, repos=repolist, columns=["created", "closed", "merged"])
+    if df is None:
+        return timeout_graph
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -175,20 +175,11 @@ def process_data(df: pd.DataFrame, start_date, end_date):
     The output of this function is the data you intend to create a visualization with,
     requiring no further processing."""
 
-    # convert to datetime objects rather than strings
-    # ADD ANY OTHER COLUMNS WITH DATETIME
-    df["created"] = pd.to_datetime(df["created"], utc=True)
-    df["merged"] = pd.to_datetime(df["merged"], utc=True)
-    df["closed"] = pd.to_datetime(df["closed"], utc=True)
-
     # order values chronologically by created date
-    df = df.sort_values(by="created", axis=0, ascending=True)
+    df = sort_by_date(df, "created")
     
     # filter values based on date picker
-    if start_date is not None:
-        df = df[df.created >= start_date]
-    if end_date is not None:
-        df = df[df.created <= end_date]
+    df = filter_by_date(df, "created", start_date, end_date)
 
     # then add new column for duration
     df['duration'] = (df['merged'] - df['created']).dt.days
@@ -11,7 +11,7 @@ from pages.utils.graph_utils import get_graph_time_values, color_seq
 # from queries.QUERY_NAME import QUERY_NAME as QUERY_INITIALS
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 
 """
@@ -191,10 +191,9 @@ def toggle_popover(n, is_open):
 def defect_resolution_duration_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=QUERY_INITIALS, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=QUERY_INITIALS, repos=repolist)
+    df = cache.grabm_wait(func=QUERY_INITIALS, repos=repolist)
+    if df is None:
+        return timeout_graph
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -10,10 +10,12 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.time_utils import sort_by_date, filter_by_date
 from queries.contributors_query import contributors_query as ctq
+import queries.action_taxonomy as at
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 import datetime as dt
 
@@ -68,15 +70,15 @@ gc_issue_response_time = dbc.Card(
                                         dcc.Dropdown(
                                             id=f"action-type-{PAGE}-{VIZ_ID}",
                                             options=[
-                                                {"label": "Commit", "value": "Commit"},
-                                                {"label": "Issue Opened", "value": "Issue Opened"},
-                                                {"label": "Issue Comment", "value": "Issue Comment"},
-                                                {"label": "Issue Closed", "value": "Issue Closed"},
-                                                {"label": "PR Open", "value": "PR Open"},
-                                                {"label": "PR Review", "value": "PR Review"},
-                                                {"label": "PR Comment", "value": "PR Comment"},
+                                                {"label": at.COMMIT, "value": at.COMMIT},
+                                                {"label": at.ISSUE_OPENED, "value": at.ISSUE_OPENED},
+                                                {"label": at.ISSUE_COMMENT, "value": at.ISSUE_COMMENT},
+                                                {"label": at.ISSUE_CLOSED, "value": at.ISSUE_CLOSED},
+                                                {"label": at.PR_OPENED, "value": at.PR_OPENED},
+                                                {"label": at.PR_REVIEW, "value": at.PR_REVIEW},
+                                                {"label": at.PR_COMMENT, "value": at.PR_COMMENT},
                                             ],
-                                            value="Commit",
+                                            value=at.COMMIT,
                                             clearable=False,
                                         ),
                                         dbc.Alert(
@@ -216,10 +218,9 @@ def graph_title(k, action_type):
 def create_top_k_cntrbs_graph(repolist, action_type, top_k, patterns, start_date, end_date):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.grabm_wait(func=ctq, repos=repolist, columns=["created_at", "Action", "login", "cntrb_id"])
+    if df is None:
+        return timeout_graph, False
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -243,17 +244,11 @@ def create_top_k_cntrbs_graph(repolist, action_type, top_k, patterns, start_date
 
 
 def process_data(df: pd.DataFrame, action_type, top_k, patterns, start_date, end_date):
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-
     # order values chronologically by created_at date
-    df = df.sort_values(by="created_at", ascending=True)
+    df = sort_by_date(df, "created_at")
 
     # filter values based on date picker
-    if start_date is not None:
-        df = df[df.created_at >= start_date]
-    if end_date is not None:
-        df = df[df.created_at <= end_date]
+    df = filter_by_date(df, "created_at", start_date, end_date)
 
     # subset the df such that it only contains rows where the Action column value is the action type
     df = df[df["Action"].str.contains(action_type)]
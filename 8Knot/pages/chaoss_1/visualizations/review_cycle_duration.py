@@ -10,8 +10,9 @@ import pandas as pd
 import datetime as dt
 import logging
 from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.time_utils import sort_by_date
 import io
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 from queries.prs_query import prs_query as prq
 from cache_manager.cache_manager import CacheManager as cm
 import time
@@ -120,10 +121,9 @@ def toggle_popover(n, is_open):
 def prs_review_cycle_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=prq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=prq, repos=repolist)
+    df = cache.grabm_wait(func=prq, repos=repolist, columns=["created", "closed"])
+    if df is None:
+        return timeout_graph
 
     # data ready.
     start = time.perf_counter()
@@ -144,16 +144,13 @@ def prs_review_cycle_graph(repolist, interval):
     return fig
 
 def process_data(df: pd.DataFrame, interval):
-    # convert dates to datetime objects rather than strings
-    df["created"] = pd.to_datetime(df["created"], utc=True)
-    df["closed"] = pd.to_datetime(df["closed"], utc=True)
     mean = pd.DataFrame(None, columns=["Date","Value"])
     median = pd.DataFrame(None, columns=["Date","Value"])
     diff_df = pd.DataFrame(None, columns=["Duration"])
     diff = []
 
     # order values chronologically by creation date
-    df = df.sort_values(by="created", axis=0, ascending=True)
+    df = sort_by_date(df, "created")
 
     # variable to slice on to handle weekly period edge case
     period_slice = None
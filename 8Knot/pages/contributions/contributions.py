@@ -14,9 +14,17 @@ from .visualizations.issue_assignment import gc_issue_assignment
 from .visualizations.pr_assignment import gc_pr_assignment
 from .visualizations.cntrb_pr_assignment import gc_cntrib_pr_assignment
 
+# import the queries the visualizations read
+from queries.commits_query import commits_query as cq
+from queries.issues_query import issues_query as iq
+from queries.prs_query import prs_query as prq
+from queries.issue_assignee_query import issue_assignee_query as iaq
+from queries.pr_assignee_query import pr_assignee_query as praq
+
 warnings.filterwarnings("ignore")
 
-dash.register_page(__name__, path="/contributions")
+# queries that the visualizations on this page read, dispatched on visit.
+dash.register_page(__name__, path="/contributions", queries=[cq, iq, prq, iaq, praq])
 
 layout = dbc.Container(
     [
@@ -8,10 +8,11 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.time_utils import sort_by_date
 from queries.pr_assignee_query import pr_assignee_query as praq
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 import datetime as dt
 
@@ -148,10 +149,11 @@ def toggle_popover(n, is_open):
 def cntrib_pr_assignment_graph(repolist, interval, assign_req):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=praq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=praq, repos=repolist)
+    df = cache.grabm_wait(
+        func=praq, repos=repolist, columns=["created", "closed", "assign_date", "assignment_action", "assignee"]
+    )
+    if df is None:
+        return timeout_graph, False
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -171,13 +173,8 @@ def cntrib_pr_assignment_graph(repolist, interval, assign_req):
 
 def process_data(df: pd.DataFrame, interval, assign_req):
 
-    # convert to datetime objects rather than strings
-    df["created"] = pd.to_datetime(df["created"], utc=True)
-    df["closed"] = pd.to_datetime(df["closed"], utc=True)
-    df["assign_date"] = pd.to_datetime(df["assign_date"], utc=True)
-
     # order values chronologically by created date
-    df = df.sort_values(by="created", axis=0, ascending=True)
+    df = sort_by_date(df, "created")
 
     # drop all issues that have no assignments
     df = df[~df.assignment_action.isnull()]
@@ -9,7 +9,7 @@ import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
 from queries.commits_query import commits_query as cmq
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import io
 import time
 
@@ -117,10 +117,9 @@ def toggle_popover(n, is_open):
 def commits_over_time_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=cmq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=cmq, repos=repolist)
+    df = cache.grabm_wait(func=cmq, repos=repolist, columns=["date", "commits"])
+    if df is None:
+        return timeout_graph
 
     # data ready.
     start = time.perf_counter()
@@ -141,9 +140,7 @@ def commits_over_time_graph(repolist, interval):
 
 
 def process_data(df: pd.DataFrame, interval):
-    # convert to datetime objects with consistent column name
-    # incoming value should be a posix integer.
-    df["date"] = pd.to_datetime(df["date"], utc=True)
+    # rename to a consistent column name
     df.rename(columns={"date": "created"}, inplace=True)
 
     # variable to slice on to handle weekly period edge case
@@ -8,10 +8,11 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.time_utils import sort_by_date
 from queries.pr_assignee_query import pr_assignee_query as praq
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 import datetime as dt
 
@@ -111,10 +112,11 @@ def toggle_popover(n, is_open):
 def pr_assignment_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=praq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=praq, repos=repolist)
+    df = cache.grabm_wait(
+        func=praq, repos=repolist, columns=["created", "closed", "assign_date", "assignment_action", "pull_request_id"]
+    )
+    if df is None:
+        return timeout_graph
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -134,13 +136,8 @@ def pr_assignment_graph(repolist, interval):
 
 def process_data(df: pd.DataFrame, interval):
 
-    # convert to datetime objects rather than strings
-    df["created"] = pd.to_datetime(df["created"], utc=True)
-    df["closed"] = pd.to_datetime(df["closed"], utc=True)
-    df["assign_date"] = pd.to_datetime(df["assign_date"], utc=True)
-
     # order values chronologically by created date
-    df = df.sort_values(by="created", axis=0, ascending=True)
+    df = sort_by_date(df, "created")
 
     # first and last elements of the dataframe are the
     # earliest and latest events respectively
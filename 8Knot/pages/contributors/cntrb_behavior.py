@@ -10,9 +10,13 @@ from .visualizations.contributors_types_over_time import gc_contributors_over_ti
 from .visualizations.active_drifting_contributors import gc_active_drifting_contributors
 from .visualizations.new_contributor import gc_new_contributor
 
+# import the queries the visualizations read
+from queries.contributors_query import contributors_query as ctq
+
 warnings.filterwarnings("ignore")
 
-dash.register_page(__name__, path="/contributors/behavior")
+# queries that the visualizations on this page read, dispatched on visit.
+dash.register_page(__name__, path="/contributors/behavior", queries=[ctq])
 
 layout = dbc.Container(
     [
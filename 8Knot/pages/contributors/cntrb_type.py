@@ -9,9 +9,14 @@ from .visualizations.contribs_by_action import gc_contribs_by_action
 from .visualizations.contrib_importance_pie import gc_contrib_importance_pie
 from .visualizations.contrib_importance_over_time import gc_contrib_prolificacy_over_time
 
+# import the queries the visualizations read
+from queries.commits_query import commits_query as cq
+from queries.contributors_query import contributors_query as ctq
+
 warnings.filterwarnings("ignore")
 
-dash.register_page(__name__, path="/contributors/contribution_types")
+# queries that the visualizations on this page read, dispatched on visit.
+dash.register_page(__name__, path="/contributors/contribution_types", queries=[cq, ctq])
 
 layout = dbc.Container(
     [
@@ -11,7 +11,7 @@ from pages.utils.graph_utils import color_seq
 from queries.commits_query import commits_query as cmq
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 
 PAGE = "contributors"
@@ -115,10 +115,13 @@ def toggle_popover(n, is_open):
 def contrib_activity_cycle_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=cmq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=cmq, repos=repolist)
+    df = cache.grabm_wait(
+        func=cmq,
+        repos=repolist,
+        columns=["author_timestamp", "committer_timestamp", "author_utc_offset", "committer_utc_offset"],
+    )
+    if df is None:
+        return timeout_graph
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -138,16 +141,14 @@ def contrib_activity_cycle_graph(repolist, interval):
 
 
 def process_data(df: pd.DataFrame, interval):
-    # for this usecase we want the datetimes to be in their local values
-    # tricking pandas to keep local values when UTC conversion is required for to_datetime
-    df["author_timestamp"] = df["author_timestamp"].astype("str").str[:-6]
-    df["committer_timestamp"] = df["committer_timestamp"].astype("str").str[:-6]
-
-    # convert to datetime objects rather than strings
-    df["author_timestamp"] = pd.to_datetime(df["author_timestamp"], utc=True)
-    df["committer_timestamp"] = pd.to_datetime(df["committer_timestamp"], utc=True)
     # removes duplicate values when the author and committer is the same
-    df.loc[df["author_timestamp"] == df["committer_timestamp"], "author_timestamp"] = None
+    same = df["author_timestamp"] == df["committer_timestamp"]
+
+    # for this usecase we want the datetimes to be in their local values:
+    # shift the UTC timestamps by the offsets they were recorded with
+    df["author_timestamp"] += pd.to_timedelta(df["author_utc_offset"], unit="m")
+    df["committer_timestamp"] += pd.to_timedelta(df["committer_utc_offset"], unit="m")
+    df.loc[same, "author_timestamp"] = None
 
     df_final = pd.DataFrame()
 
@@ -7,7 +7,7 @@ import pandas as pd
 import logging
 import plotly.express as px
 from pages.utils.graph_utils import color_seq
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 from queries.contributors_query import contributors_query as ctq
 import time
 import io
@@ -156,10 +156,9 @@ def graph_title(view):
 def repeat_drive_by_graph(repolist, contribs, view):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.grabm_wait(func=ctq, repos=repolist, columns=["created_at", "Action", "rank", "cntrb_id"])
+    if df is None:
+        return timeout_graph
 
     # data ready.
     start = time.perf_counter()
@@ -186,8 +185,7 @@ def repeat_drive_by_graph(repolist, contribs, view):
 
 
 def process_data(df, view, contribs):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    # rename to a consistent column name
     df.rename(columns={"created_at": "created"}, inplace=True)
 
     # graph on contribution subset
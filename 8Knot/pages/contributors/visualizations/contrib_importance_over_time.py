@@ -10,10 +10,12 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.time_utils import sort_by_date
 from queries.contributors_query import contributors_query as ctq
+import queries.action_taxonomy as at
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 import datetime as dt
 from scipy import stats
@@ -235,11 +237,9 @@ def create_contrib_prolificacy_over_time_graph(
 ):
     # main function for all data pre processing
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.grabm_wait(func=ctq, repos=repolist, columns=["created_at", "Action", "login", "cntrb_id"])
+    if df is None:
+        return timeout_graph, False
 
     # data ready.
     start = time.perf_counter()
@@ -264,11 +264,8 @@ def create_contrib_prolificacy_over_time_graph(
 
 def process_data(df, patterns, threshold, window_width, step_size, start_date, end_date):
 
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-
     # order values chronologically by created_at date
-    df = df.sort_values(by="created_at", ascending=True)
+    df = sort_by_date(df, "created_at")
 
     # if the start_date and/or the end date is not specified set them to the beginning and most recent created_at date
     if start_date is None:
@@ -294,13 +291,13 @@ def process_data(df, patterns, threshold, window_width, step_size, start_date, e
 
     # dynamically calculate the contributor prolificacy over time for each of the action times and store results in df_final
     (
-        df_final["Commit"],
-        df_final["Issue Opened"],
-        df_final["Issue Comment"],
-        df_final["Issue Closed"],
-        df_final["PR Opened"],
-        df_final["PR Comment"],
-        df_final["PR Review"],
+        df_final[at.COMMIT],
+        df_final[at.ISSUE_OPENED],
+        df_final[at.ISSUE_COMMENT],
+        df_final[at.ISSUE_CLOSED],
+        df_final[at.PR_OPENED],
+        df_final[at.PR_COMMENT],
+        df_final[at.PR_REVIEW],
     ) = zip(
         *df_final.apply(
             lambda row: cntrb_prolificacy_over_time(df, row.period_from, row.period_to, window_width, threshold), axis=1
@@ -321,9 +318,9 @@ def create_figure(df_final, step_size):
     fig = go.Figure(
         [
             go.Scatter(
-                name="Commit",
+                name=at.COMMIT,
                 x=df_final["period_from"],
-                y=df_final["Commit"],
+                y=df_final[at.COMMIT],
                 text=action_types[0],
                 customdata=time_window,
                 mode="lines",
@@ -331,9 +328,9 @@ def create_figure(df_final, step_size):
                 marker=dict(color=color_seq[0]),
             ),
             go.Scatter(
-                name="Issue Opened",
+                name=at.ISSUE_OPENED,
                 x=df_final["period_from"],
-                y=df_final["Issue Opened"],
+                y=df_final[at.ISSUE_OPENED],
                 text=action_types[1],
                 customdata=time_window,
                 mode="lines",
@@ -341,9 +338,9 @@ def create_figure(df_final, step_size):
                 marker=dict(color=color_seq[1]),
             ),
             go.Scatter(
-                name="Issue Comment",
+                name=at.ISSUE_COMMENT,
                 x=df_final["period_from"],
-                y=df_final["Issue Comment"],
+                y=df_final[at.ISSUE_COMMENT],
                 text=action_types[2],
                 customdata=time_window,
                 mode="lines",
@@ -351,9 +348,9 @@ def create_figure(df_final, step_size):
                 marker=dict(color=color_seq[2]),
             ),
             go.Scatter(
-                name="Issue Closed",
+                name=at.ISSUE_CLOSED,
                 x=df_final["period_from"],
-                y=df_final["Issue Closed"],
+                y=df_final[at.ISSUE_CLOSED],
                 text=action_types[3],
                 customdata=time_window,
                 mode="lines",
@@ -361,9 +358,9 @@ def create_figure(df_final, step_size):
                 marker=dict(color=color_seq[3]),
             ),
             go.Scatter(
-                name="PR Opened",
+                name=at.PR_OPENED,
                 x=df_final["period_from"],
-                y=df_final["PR Opened"],
+                y=df_final[at.PR_OPENED],
                 text=action_types[4],
                 customdata=time_window,
                 mode="lines",
@@ -371,9 +368,9 @@ def create_figure(df_final, step_size):
                 marker=dict(color=color_seq[4]),
             ),
             go.Scatter(
-                name="PR Comment",
+                name=at.PR_COMMENT,
                 x=df_final["period_from"],
-                y=df_final["PR Comment"],
+                y=df_final[at.PR_COMMENT],
                 text=action_types[5],
                 customdata=time_window,
                 mode="lines",
@@ -381,9 +378,9 @@ def create_figure(df_final, step_size):
                 marker=dict(color=color_seq[5]),
             ),
             go.Scatter(
-                name="PR Review",
+                name=at.PR_REVIEW,
                 x=df_final["period_from"],
-                y=df_final["PR Review"],
+                y=df_final[at.PR_REVIEW],
                 text=action_types[6],
                 customdata=time_window,
                 mode="lines",
@@ -447,13 +444,13 @@ def cntrb_prolificacy_over_time(df, period_from, period_to, window_width, thresh
     # pivot df such that the column names correspond to the different action types, index is the cntrb_ids, and the values are the number of contributions of each contributor
     df_count_cntrbs = df_count_cntrbs.pivot(index="cntrb_id", columns="Action", values="count")
 
-    commit = calc_cntrb_prolificacy(df_count_cntrbs, "Commit", threshold)
-    issueOpened = calc_cntrb_prolificacy(df_count_cntrbs, "Issue Opened", threshold)
-    issueComment = calc_cntrb_prolificacy(df_count_cntrbs, "Issue Comment", threshold)
-    issueClosed = calc_cntrb_prolificacy(df_count_cntrbs, "Issue Closed", threshold)
-    prOpened = calc_cntrb_prolificacy(df_count_cntrbs, "PR Opened", threshold)
-    prReview = calc_cntrb_prolificacy(df_count_cntrbs, "PR Review", threshold)
-    prComment = calc_cntrb_prolificacy(df_count_cntrbs, "PR Comment", threshold)
+    commit = calc_cntrb_prolificacy(df_count_cntrbs, at.COMMIT, threshold)
+    issueOpened = calc_cntrb_prolificacy(df_count_cntrbs, at.ISSUE_OPENED, threshold)
+    issueComment = calc_cntrb_prolificacy(df_count_cntrbs, at.ISSUE_COMMENT, threshold)
+    issueClosed = calc_cntrb_prolificacy(df_count_cntrbs, at.ISSUE_CLOSED, threshold)
+    prOpened = calc_cntrb_prolificacy(df_count_cntrbs, at.PR_OPENED, threshold)
+    prReview = calc_cntrb_prolificacy(df_count_cntrbs, at.PR_REVIEW, threshold)
+    prComment = calc_cntrb_prolificacy(df_count_cntrbs, at.PR_COMMENT, threshold)
 
     return commit, issueOpened, issueComment, issueClosed, prOpened, prReview, prComment
 
@@ -8,10 +8,12 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.time_utils import sort_by_date
 from queries.contributors_query import contributors_query as ctq
+import queries.action_taxonomy as at
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 
 
@@ -60,16 +62,16 @@ gc_contribs_by_action = dbc.Card(
                                             id=f"action-dropdown-{PAGE}-{VIZ_ID}",
                                             options=[
                                                 {
-                                                    "label": "PR Open",
-                                                    "value": "PR Opened",
+                                                    "label": at.PR_OPENED,
+                                                    "value": at.PR_OPENED,
                                                 },
                                                 {"label": "Comment", "value": "Comment"},
-                                                {"label": "PR Review", "value": "PR Review"},
-                                                {"label": "Issue Opened", "value": "Issue Opened"},
-                                                {"label": "Issue Closed", "value": "Issue Closed"},
-                                                {"label": "Commit", "value": "Commit"},
+                                                {"label": at.PR_REVIEW, "value": at.PR_REVIEW},
+                                                {"label": at.ISSUE_OPENED, "value": at.ISSUE_OPENED},
+                                                {"label": at.ISSUE_CLOSED, "value": at.ISSUE_CLOSED},
+                                                {"label": at.COMMIT, "value": at.COMMIT},
                                             ],
-                                            value="PR Opened",
+                                            value=at.PR_OPENED,
                                             clearable=False,
                                         ),
                                         dbc.Alert(
@@ -157,10 +159,9 @@ def contribs_by_action_graph(repolist, interval, action):
 
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.grabm_wait(func=ctq, repos=repolist, columns=["created_at", "Action"])
+    if df is None:
+        return timeout_graph, False
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -185,11 +186,8 @@ def contribs_by_action_graph(repolist, interval, action):
 
 def process_data(df: pd.DataFrame, interval, action):
 
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-
     # order values chronologically by COLUMN_TO_SORT_BY date
-    df = df.sort_values(by="created_at", axis=0, ascending=True)
+    df = sort_by_date(df, "created_at")
 
     # drop all contributions that are not the selected action
     df = df[df["Action"].str.contains(action)]
@@ -8,8 +8,9 @@ import logging
 import numpy as np
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.time_utils import sort_by_date
 
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 from queries.contributors_query import contributors_query as ctq
 import time
 import io
@@ -140,10 +141,9 @@ def toggle_popover(n, is_open):
 def create_contrib_over_time_graph(repolist, contribs, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.grabm_wait(func=ctq, repos=repolist)
+    if df is None:
+        return timeout_graph
 
     start = time.perf_counter()
     logging.warning("CONTRIB_DRIVE_REPEAT_VIZ - START")
@@ -163,8 +163,7 @@ def create_contrib_over_time_graph(repolist, contribs, interval):
 
 
 def process_data(df, interval, contribs):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    # rename to a consistent column name
     df.rename(columns={"created_at": "created"}, inplace=True)
 
     # remove null contrib ids
@@ -178,7 +177,7 @@ def process_data(df, interval, contribs):
     df_repeat_temp = df.loc[df["cntrb_id"].isin(contributors)]
 
     # order values chronologically by creation date
-    df = df.sort_values(by="created", axis=0, ascending=True)
+    df = sort_by_date(df, "created")
 
     # variable to slice on to handle weekly period edge case
     period_slice = None
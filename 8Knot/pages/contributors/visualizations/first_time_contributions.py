@@ -11,7 +11,7 @@ from queries.contributors_query import contributors_query as ctq
 from cache_manager.cache_manager import CacheManager as cm
 import io
 import time
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 
 PAGE = "contributors"
 VIZ_ID = "first-time-contribution"
@@ -80,10 +80,9 @@ def toggle_popover(n, is_open):
 def create_first_time_contributors_graph(repolist):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.grabm_wait(func=ctq, repos=repolist, columns=["created_at", "Action", "rank"])
+    if df is None:
+        return timeout_graph
 
     start = time.perf_counter()
     logging.warning("CONTRIB_DRIVE_REPEAT_VIZ - START")
@@ -103,8 +102,7 @@ def create_first_time_contributors_graph(repolist):
 
 
 def process_data(df):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    # rename to a consistent column name
     df.rename(columns={"created_at": "created"}, inplace=True)
 
     # selection for 1st contribution only
@@ -10,7 +10,7 @@ from pages.utils.graph_utils import get_graph_time_values, color_seq
 from queries.contributors_query import contributors_query as ctq
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 
 PAGE = "contributors"
@@ -127,10 +127,9 @@ def graph_title(view):
 def new_contributor_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.grabm_wait(func=ctq, repos=repolist, columns=["created_at", "rank", "cntrb_id"])
+    if df is None:
+        return timeout_graph
 
     logging.warning("TOTAL_CONTRIBUTOR_GROWTH_VIZ - START")
     start = time.perf_counter()
@@ -150,8 +149,7 @@ def new_contributor_graph(repolist, interval):
 
 
 def process_data(df, interval):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    # rename to a consistent column name
     df.rename(columns={"created_at": "created"}, inplace=True)
 
     # order from beginning of time to most recent
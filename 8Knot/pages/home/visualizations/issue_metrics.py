@@ -135,17 +135,19 @@ def avg_closed_issue_age(repolist):
 
     # run query
     df = db.run_query(
-        f"""
+        """
         select
             avg(now() - i.created_at) as difference
         from
             augur_data.issues i,
             augur_data.repo r
         where
-            r.repo_id in ({str(repolist)[1:-1]})
+            r.repo_id = ANY(:repo_ids)
             and i.repo_id = r.repo_id
             and i.closed_at is not null
-        """
+        """,
+        params={"repo_ids": repolist},
+        interactive=True,
     )
 
     # timedelta object
@@ -184,17 +186,19 @@ def avg_open_issue_age(repolist):
 
     # run query
     df = db.run_query(
-        f"""
+        """
         select
             avg(now() - i.created_at) as difference
         from
             augur_data.issues i,
             augur_data.repo r
         where
-            r.repo_id in ({str(repolist)[1:-1]})
+            r.repo_id = ANY(:repo_ids)
             and i.repo_id = r.repo_id
             and i.closed_at is null
-        """
+        """,
+        params={"repo_ids": repolist},
+        interactive=True,
     )
 
     # timedelta object
@@ -233,17 +237,19 @@ def closed_issue_count(repolist):
 
     # run query
     df = db.run_query(
-        f"""
+        """
         select
             count(distinct i.issue_id) as num_open_issues
         from
             augur_data.issues i,
             augur_data.repo r
         where
-            r.repo_id in ({str(repolist)[1:-1]})
+            r.repo_id = ANY(:repo_ids)
             and i.repo_id = r.repo_id
             and i.closed_at is not null
-        """
+        """,
+        params={"repo_ids": repolist},
+        interactive=True,
     )
 
     return df.iat[0, 0]
@@ -270,17 +276,19 @@ def open_issue_count(repolist):
 
     # run query
     df = db.run_query(
-        f"""
+        """
         select
             count(distinct i.issue_id) as num_open_issues
         from
             augur_data.issues i,
             augur_data.repo r
         where
-            r.repo_id in ({str(repolist)[1:-1]})
+            r.repo_id = ANY(:repo_ids)
             and i.repo_id = r.repo_id
             and i.closed_at is null
-        """
+        """,
+        params={"repo_ids": repolist},
+        interactive=True,
     )
 
     return df.iat[0, 0]
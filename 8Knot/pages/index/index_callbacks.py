@@ -9,9 +9,10 @@ import dash_bootstrap_components as dbc
 import dash
 from dash import callback
 from dash.dependencies import Input, Output, State
-from app import augur
+from app import augur, celery_app
 from flask_login import current_user
-from cache_manager.cache_manager import CacheManager as cm
+from cache_manager.cache_manager import CacheManager as cm, READY_TIMEOUT, GRAB_TIMEOUT
+from cache_manager.redis_pools import users_client
 from queries.issues_query import issues_query as iq
 from queries.commits_query import commits_query as cq
 from queries.contributors_query import contributors_query as cnq
@@ -20,6 +21,7 @@ from queries.company_query import company_query as cmq
 from queries.pr_assignee_query import pr_assignee_query as praq
 from queries.issue_assignee_query import issue_assignee_query as iaq
 from queries.user_groups_query import user_groups_query as ugq
+from queries.stitch_slices import stitch_slices  # combines time-sliced queries of very large repos
 #from queries.change_requests_query import change_requests_query as crq
 import redis
 import flask
@@ -29,6 +31,29 @@ import flask
 #QUERIES = [iq, cq, cnq, prq, cmq, iaq, praq, crq]
 QUERIES = [iq, cq, cnq, prq, cmq, iaq, praq]
 
+# whether to also run the queries that the current page doesn't read,
+# at PREFETCH_PRIORITY so that they don't hold up the current page's queries.
+# (the Redis broker consumes lower priority values first.)
+PREFETCH = os.getenv("QUERY_PREFETCH", "True") == "True"
+PREFETCH_PRIORITY = 9
+
+
+def page_queries(pathname):
+    """Gets the queries that the visualizations on a page read,
+    as declared by the page's 'dash.register_page(..., queries=[...])'.
+
+    Args:
+        pathname (str): path of the page
+
+    Returns:
+        [function]: query functions, empty if the page reads none.
+    """
+    for page in dash.page_registry.values():
+        if page["relative_path"] == pathname:
+            return page.get("queries", [])
+    return []
+
+
 # check if login has been enabled in config
 login_enabled = os.getenv("AUGUR_LOGIN_ENABLED", "False") == "True"
 
@@ -53,21 +78,18 @@ def kick_off_group_collection(url, n_clicks):
     """
     if current_user.is_authenticated:
         user_id = current_user.get_id()
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-        )
+        users_cache = users_client()
+
+        # TODO: check how old groups are. If they're pretty old (threshold tbd) then requery
+
+        # check if groups are not already cached, or if the refresh-button was pressed
         try:
-            users_cache.ping()
+            cached = users_cache.exists(f"{user_id}_groups")
         except redis.exceptions.ConnectionError:
             logging.error("GROUP-COLLECTION: Could not connect to users-cache.")
             return dash.no_update
 
-        # TODO: check how old groups are. If they're pretty old (threshold tbd) then requery
-
-        # check if groups are not already cached, or if the refresh-button was pressed
-        if not users_cache.exists(f"{user_id}_groups") or (dash.ctx.triggered_id == "refresh-button"):
+        if not cached or (dash.ctx.triggered_id == "refresh-button"):
             # kick off celery task to collect groups
             # on query worker queue,
             return [ugq.apply_async(args=[user_id], queue="data").id]
@@ -123,20 +145,15 @@ def login_username_button(url):
         if current_user.is_authenticated:
             logging.warning(f"LOGINBUTTON: USER LOGGED IN {current_user}")
             # TODO: implement more permanent interface
-            users_cache = redis.StrictRedis(
-                host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-                port=6379,
-                password=os.getenv("REDIS_PASSWORD", ""),
-            )
+            users_cache = users_client()
+
+            user_id = current_user.get_id()
             try:
-                users_cache.ping()
+                user_info = json.loads(users_cache.get(user_id))
             except redis.exceptions.ConnectionError:
                 logging.error("USERNAME: Could not connect to users-cache.")
                 return dash.no_update
 
-            user_id = current_user.get_id()
-            user_info = json.loads(users_cache.get(user_id))
-
             navlink = [
                 dbc.NavItem(
                     dbc.NavLink(
@@ -183,23 +200,16 @@ def dynamic_multiselect_options(user_in: str, selections):
     if current_user.is_authenticated:
         logging.warning(f"LOGINBUTTON: USER LOGGED IN {current_user}")
         # TODO: implement more permanent interface
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-            decode_responses=True,
-        )
+        users_cache = users_client(decode_responses=True)
+
         try:
-            users_cache.ping()
+            group_options = users_cache.get(f"{current_user.get_id()}_group_options")
         except redis.exceptions.ConnectionError:
             logging.error("MULTISELECT: Could not connect to users-cache.")
             return dash.no_update
 
-        try:
-            if users_cache.exists(f"{current_user.get_id()}_group_options"):
-                options = options + json.loads(users_cache.get(f"{current_user.get_id()}_group_options"))
-        except redis.exceptions.ConnectionError:
-            logging.error("Searchbar: couldn't connect to Redis for user group options.")
+        if group_options is not None:
+            options = options + json.loads(group_options)
 
     # if the number of options changes then we're
     # adding AUGUR_ entries somewhere.
@@ -252,24 +262,17 @@ def multiselect_values_to_repo_ids(n_clicks, user_vals):
     if current_user.is_authenticated:
         logging.warning(f"LOGINBUTTON: USER LOGGED IN {current_user}")
         # TODO: implement more permanent interface
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-            decode_responses=True,
-        )
+        users_cache = users_client(decode_responses=True)
+
         try:
-            users_cache.ping()
+            groups = users_cache.get(f"{current_user.get_id()}_groups")
         except redis.exceptions.ConnectionError:
             logging.error("SEARCH-BUTTON: Could not connect to users-cache.")
             return dash.no_update
 
-        try:
-            if users_cache.exists(f"{current_user.get_id()}_groups"):
-                user_groups = json.loads(users_cache.get(f"{current_user.get_id()}_groups"))
-                logging.warning(f"USERS Groups: {type(user_groups)}, {user_groups}")
-        except redis.exceptions.ConnectionError:
-            logging.error("Searchbar: couldn't connect to Redis for user group options.")
+        if groups is not None:
+            user_groups = json.loads(groups)
+            logging.warning(f"USERS Groups: {type(user_groups)}, {user_groups}")
 
     group_repos = [user_groups[g] for g in names if not augur.is_org(g)]
     # flatten list repo_ids in orgs to 1D
@@ -337,83 +340,131 @@ def show_help_alert(n_clicks, openness, repo_ids):
 @callback(
     [Output("data-badge", "children"), Output("data-badge", "color")],
     Input("job-ids", "data"),
+    [State("repo-choices", "data"), State("url", "pathname")],
     background=True,
+    progress=[Output("data-progress", "children")],
+    progress_default=[""],
 )
-def wait_queries(job_ids):
-    # TODO add docstring to function
+def wait_queries(set_progress, job_ids, repos, pathname):
+    """Waits for the query tasks enqueued by 'run_queries' to finish
+    and reports how many (query, repo) datasets are cached while waiting.
+
+    Doesn't poll task status. Blocks on the channels that the Celery
+    result backend publishes task state changes on, and on the cache
+    readiness channels that the queries publish to when data is set.
+    This holds a process of the default queue's worker, but it sleeps in
+    the blocking read rather than using CPU, and gives up after GRAB_TIMEOUT
+    seconds, the time the visualizations wait for their data as well.
+
+    Args:
+        set_progress (function): sets the 'data-progress' text.
+        job_ids ([str]): IDs of the Celery query tasks.
+        repos ([int]): repositories that data is being collected for.
+        pathname (str): path of the current page.
+
+    Returns:
+        str, str: data-badge text and color.
+    """
 
     jobs = [AsyncResult(j_id) for j_id in job_ids]
 
+    if not jobs:
+        return "Data Ready", "#b5b683"
+
+    cache = cm()
+    funcs = page_queries(pathname)
+
+    # wake up whenever a job changes state or a query sets data.
+    pubsub = cache.subscribe(
+        funcs=funcs,
+        channels=[celery_app.backend.get_key_for_task(j.id) for j in jobs],
+    )
+
     # default 'result_expires' for celery config is 86400 seconds.
     # so we don't have to check if the jobs exist. if this tasks
     # is enqueued 24 hours after the query-worker tasks finish
-    # then we have a big problem. However, we should 'forget' all
-    # results before we exit.
+    # then we have a big problem.
 
-    while True:
-        logging.warning([j.status for j in jobs])
+    deadline = time.monotonic() + GRAB_TIMEOUT
 
-        # jobs are either all ready
-        if all(j.successful() for j in jobs):
+    try:
+        while True:
             logging.warning([j.status for j in jobs])
-            jobs = [j.forget() for j in jobs]
-            return "Data Ready", "#b5b683"
 
-        # or one of them has failed
-        if any(j.failed() for j in jobs):
-            # if a job fails, we need to wait for the others to finish before
-            # we can 'forget' them. otherwise to-be-successful jobs will always
-            # be forgotten if one fails.
+            # per-repo progress across the page's queries
+            if repos and funcs:
+                num_ready = sum(cache.existsm(func=f, repos=repos) for f in funcs)
+                set_progress([f"{num_ready}/{len(funcs) * len(repos)} datasets ready"])
 
-            # tasks need to have either failed or succeeded before being forgotten.
-            while True:
-                num_succeeded = [j.successful() for j in jobs].count(True)
-                num_failed = [j.failed() for j in jobs].count(True)
-                num_total = num_failed + num_succeeded
+            # jobs are either all ready
+            # (results aren't forgotten: other sessions may be waiting on the
+            # same tasks. they expire with the backend's 'result_expires'.)
+            if all(j.successful() for j in jobs):
+                logging.warning([j.status for j in jobs])
+                return "Data Ready", "#b5b683"
 
-                if num_total == len(jobs):
-                    break
+            # or one of them has failed
+            if any(j.failed() for j in jobs):
+                return "Data Incomplete- Retry", "danger"
 
-                time.sleep(4.0)
+            # or they're taking too long; the progress text stays as is.
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logging.error(f"WAIT_QUERIES: JOBS NOT DONE AFTER {GRAB_TIMEOUT}s")
+                return "Data Delayed- Retry", "warning"
 
-            jobs = [j.forget() for j in jobs]
-            return "Data Incomplete- Retry", "danger"
-
-        # pause to let something change
-        time.sleep(2.0)
+            # block until something changes
+            pubsub.get_message(timeout=min(READY_TIMEOUT, remaining))
+    finally:
+        pubsub.close()
 
 
 @callback(
     Output("job-ids", "data"),
-    Input("repo-choices", "data"),
+    [Input("repo-choices", "data"), Input("url", "pathname")],
 )
-def run_queries(repos):
+def run_queries(repos, pathname):
     """
-    Executes queries defined in /queries against Augur
-    instance for input Repos; caches results in redis per
-    (query_function,repo) pair.
+    Executes the queries that the current page's visualizations
+    read against Augur instance for input Repos; caches results
+    in redis per (query_function,repo) pair. Other queries are
+    prefetched at a lower priority if QUERY_PREFETCH is set.
+
+    Repos that another task is already querying for, e.g. for another
+    user who selected the same org, aren't queried again; the IDs of
+    those tasks are returned to wait on instead.
 
     Args:
         repos ([int]): repositories we collect data for.
+        pathname (str): path of the current page.
+
+    Returns:
+        [str]: IDs of the tasks querying for the current page's repos that aren't cached.
     """
 
     # cache manager object
     cache = cm()
 
     # list of queries to process
-    funcs = QUERIES
+    funcs = page_queries(pathname)
 
-    # list of job promises
-    jobs = []
+    # list of job IDs
+    job_ids = []
 
     for f in funcs:
-        # only download repos that aren't currently in cache
-        not_ready = [r for r in repos if cache.exists(f, r) != 1]
+        # only download repos that aren't currently in cache,
+        # and only if no other task is already downloading them.
+        job_ids.extend(cache.dispatchm(func=f, repos=repos))
+
+    if PREFETCH:
+        # not waited on; the page only waits for what it reads.
+        for f in QUERIES:
+            if f not in funcs:
+                cache.dispatchm(func=f, repos=repos, priority=PREFETCH_PRIORITY)
 
-        # add job to queue
-        j = f.apply_async(args=[not_ready], queue="data")
+    # bring old data up to date in the background; the page reads what's cached meanwhile.
+    for f in QUERIES:
+        cache.refreshm(func=f, repos=repos, priority=PREFETCH_PRIORITY)
 
-        # add job promise to local promise list
-        jobs.append(j)
+    return job_ids
 
-    return [j.id for j in jobs]
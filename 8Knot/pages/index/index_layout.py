@@ -290,6 +290,8 @@ layout = dbc.Container(
                             type="cube",
                             color="#436755",
                         ),
+                        # download progress, set while the queries run
+                        html.Div(id="data-progress", className="me-1"),
                         # where our page will be rendered
                         dash.page_container,
                     ],
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+
+def sort_by_date(df, column):
+    """
+    Orders a DataFrame chronologically by a date/time column, nulls first.
+
+    Data from the cache is usually already in order: 'CacheManager.grabm'
+    marks it w/ attrs["sorted_by"], and then it's returned as is.
+
+    Args:
+    -----
+        df (pd.DataFrame): data to order
+        column (str): date/time column to order by
+
+    Returns:
+    --------
+        pd.DataFrame: ordered data, marked as sorted by 'column'
+    """
+    if df.attrs.get("sorted_by") == column:
+        return df
+
+    df = df.sort_values(by=column, axis=0, ascending=True, na_position="first", kind="stable")
+    df.attrs["sorted_by"] = column
+    return df
+
+
+def filter_by_date(df, column, start_date=None, end_date=None):
+    """
+    Selects the rows whose 'column' falls between the date picker's
+    'start_date' and 'end_date', inclusive.
+
+    If the data is sorted by 'column' (see 'sort_by_date') the range is found
+    w/ a binary search and sliced out, instead of comparing every row.
+
+    Args:
+    -----
+        df (pd.DataFrame): data to filter
+        column (str): date/time column to filter by
+        start_date (str | None): first date, no lower bound if None
+        end_date (str | None): last date, no upper bound if None
+
+    Returns:
+    --------
+        pd.DataFrame: rows in range
+    """
+    if start_date is None and end_date is None:
+        return df
+
+    dates = df[column]
+    if df.attrs.get("sorted_by") != column or not pd.api.types.is_datetime64_any_dtype(dates):
+        if start_date is not None:
+            df = df[dates >= start_date]
+        if end_date is not None:
+            df = df[df[column] <= end_date]
+        return df
+
+    # nulls are first, and the smallest int64, so the int64 values are in order.
+    keys = dates.values.view("i8")
+
+    def position(date, side):
+        date = pd.Timestamp(date)
+        date = date.tz_localize("UTC") if date.tz is None else date.tz_convert("UTC")
+        key = date.tz_localize(None).to_datetime64().astype(dates.values.dtype).view("i8")
+        return np.searchsorted(keys, key, side=side)
+
+    # null dates are never in range
+    first = np.searchsorted(keys, np.iinfo(np.int64).min, side="right")
+    if start_date is not None:
+        first = max(first, position(start_date, "left"))
+    last = position(end_date, "right") if end_date is not None else len(keys)
+
+    return df.iloc[first:last]
+
+
+def _to_ns(values):
+    """
+    (private)
+    Converts datetimes to int64 nanoseconds since the epoch, in UTC.
+    Nulls become the smallest int64.
+    """
+    index = pd.DatetimeIndex(values)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.values.astype("datetime64[ns]").view("i8")
+
+
+def count_open(created, closed, dates, min_age=None, inclusive=True):
+    """
+    Counts the items (e.g. PRs or issues) open at each date: created by
+    then and not yet closed. w/ 'min_age', only the items that were created
+    at least that long before the date are counted.
+
+    Rather than filtering the items for every date, each item is turned into
+    an event that adds one to the dates from when it counts, and one that
+    subtracts one from when it's closed. Events are binned by date and the
+    running sum gives the counts, in O((items + dates) log dates).
+
+    Args:
+    -----
+        created (pd.Series): creation times of the items
+        closed (pd.Series): closing times of the items, null if still open
+        dates (pd.DatetimeIndex | pd.Series): dates to count at, in order
+        min_age (pd.Timedelta | None): least age of the counted items
+        inclusive (bool): whether items exactly 'min_age' old are counted
+
+    Returns:
+    --------
+        np.ndarray: number of items open at each date
+    """
+    created, closed, dates = _to_ns(created), _to_ns(closed), _to_ns(dates)
+    null = np.iinfo(np.int64).min
+
+    # items that never opened aren't counted
+    known = created != null
+    created, closed = created[known], closed[known]
+
+    # from when an item counts: once it's 'min_age' old (strictly older if not inclusive)
+    shift = 0 if min_age is None else pd.Timedelta(min_age).value
+    counts_from = created + shift + (0 if inclusive else 1)
+
+    # until it's closed, if that's later
+    was_closed = closed != null
+    counts_until = np.maximum(closed[was_closed], counts_from[was_closed])
+
+    # events apply to every date at or after them
+    bins = len(dates) + 1
+    deltas = np.bincount(np.searchsorted(dates, counts_from, side="left"), minlength=bins)
+    deltas -= np.bincount(np.searchsorted(dates, counts_until, side="left"), minlength=bins)
+
+    return np.cumsum(deltas[: len(dates)])
+
+
+def count_new_staling_stale(created, closed, dates, staling_days, stale_days):
+    """
+    Splits the items open at each date by age: new ones were created within
+    'staling_days' of the date, stale ones 'stale_days' or more before it,
+    and staling ones in between. See 'count_open'.
+
+    Args:
+    -----
+        created (pd.Series): creation times of the items
+        closed (pd.Series): closing times of the items, null if still open
+        dates (pd.DatetimeIndex | pd.Series): dates to count at, in order
+        staling_days (int): days after which an open item is staling
+        stale_days (int): days after which an open item is stale
+
+    Returns:
+    --------
+        (np.ndarray, np.ndarray, np.ndarray): new, staling and stale items at each date
+    """
+    num_open = count_open(created, closed, dates)
+
+    # open items created more than 'staling_days' before the date
+    older = count_open(created, closed, dates, min_age=pd.Timedelta(days=staling_days), inclusive=False)
+
+    # of those, the ones created 'stale_days' or more before the date
+    if stale_days > staling_days:
+        stale = count_open(created, closed, dates, min_age=pd.Timedelta(days=stale_days))
+    else:
+        stale = older
+
+    return num_open - older, older - stale, stale
@@ -8,10 +8,11 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.time_utils import sort_by_date
 from queries.QUERY_NAME import QUERY_NAME as QUERY_INITIALS
 import io
 from cache_manager.cache_manager import CacheManager as cm
-from pages.utils.job_utils import nodata_graph
+from pages.utils.job_utils import nodata_graph, timeout_graph
 import time
 
 """
@@ -189,10 +190,9 @@ def toggle_popover(n, is_open):
 def NAME_OF_VISUALIZATION_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=QUERY_INITIALS, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=QUERY_INITIALS, repos=repolist)
+    df = cache.grabm_wait(func=QUERY_INITIALS, repos=repolist)
+    if df is None:
+        return timeout_graph
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -216,12 +216,10 @@ def process_data(df: pd.DataFrame, interval):
     The output of this function is the data you intend to create a visualization with,
     requiring no further processing."""
 
-    # convert to datetime objects rather than strings
-    # ADD ANY OTHER COLUMNS WITH DATETIME
-    df["COLUMN_WITH_DATETIME"] = pd.to_datetime(df["COLUMN_WITH_DATETIME"], utc=True)
+    # date and time columns arrive from the cache as UTC datetimes, no conversion needed
 
     # order values chronologically by COLUMN_TO_SORT_BY date
-    df = df.sort_values(by="COLUMN_TO_SORT_BY", axis=0, ascending=True)
+    df = sort_by_date(df, "COLUMN_TO_SORT_BY")
 
     """LOOK AT OTHER VISUALIZATIONS TO SEE IF ANY HAVE A SIMILAR DATA PROCESS"""
 
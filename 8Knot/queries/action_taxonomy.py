@@ -0,0 +1,58 @@
+"""
+Contributor actions, as labeled in the 'Action' column of contributors_query data.
+
+Augur names actions e.g. "pull_request_review_APPROVED"; contributors_query
+relabels them once, when the data is queried, and visualizations refer to the
+labels by the constants below instead of spelling them out.
+"""
+
+import numpy as np
+import pandas as pd
+
+COMMIT = "Commit"
+ISSUE_OPENED = "Issue Opened"
+ISSUE_COMMENT = "Issue Comment"
+ISSUE_CLOSED = "Issue Closed"
+PR_OPENED = "PR Opened"
+PR_COMMENT = "PR Comment"
+PR_REVIEW = "PR Review"
+PR_CLOSED = "PR Closed"
+PR_MERGED = "PR Merged"
+
+# Augur action -> label. Actions that aren't listed keep their Augur name.
+ACTION_LABELS = {
+    "commit": COMMIT,
+    "issue_opened": ISSUE_OPENED,
+    "issue_comment": ISSUE_COMMENT,
+    "issue_closed": ISSUE_CLOSED,
+    "pull_request_open": PR_OPENED,
+    "pull_request_comment": PR_COMMENT,
+    "pull_request_review_COMMENTED": PR_REVIEW,
+    "pull_request_review_APPROVED": PR_REVIEW,
+    "pull_request_review_CHANGES_REQUESTED": PR_REVIEW,
+    "pull_request_review_DISMISSED": PR_REVIEW,
+    "pull_request_closed": PR_CLOSED,
+    "pull_request_merged": PR_MERGED,
+}
+
+
+def label_actions(actions):
+    """Relabels Augur actions w/ ACTION_LABELS.
+
+    The column is dictionary-encoded once and only its few distinct
+    values are looked up, rather than comparing every row to every action.
+
+    Args:
+        actions (pd.Series): Augur action names.
+
+    Returns:
+        pd.Categorical: labels of the actions.
+    """
+    codes, uniques = pd.factorize(actions)
+    labels = [ACTION_LABELS.get(a, a) for a in uniques]
+
+    # several actions can share a label; the labels are encoded again so they're distinct.
+    # missing actions (code -1) pick the trailing -1.
+    label_codes, label_uniques = pd.factorize(np.array(labels, dtype=object))
+    codes = np.append(label_codes, -1)[codes]
+    return pd.Categorical.from_codes(codes, categories=label_uniques)
@@ -2,8 +2,7 @@ import logging
 import pandas as pd
 from db_manager.augur_manager import AugurManager
 from app import celery_app
-from cache_manager.cache_manager import CacheManager as cm
-import io
+from cache_manager.cache_manager import CacheManager as cm, serialize_by_repo
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -52,7 +51,9 @@ def change_requests_query(self, repos):
                     FROM
 
                     WHERE
-                        repo_id in ({str(repos)[1:-1]})
+                        repo_id = ANY(:repo_ids)
+                    ORDER BY
+                        id
                 """
 
     try:
@@ -67,51 +68,28 @@ def change_requests_query(self, repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
+    def process(r, c_df):
+        # pandas column and format updates
+        """Commonly used df updates:
 
-    # pandas column and format updates
-    """Commonly used df updates:
+        c_df["cntrb_id"] = c_df["cntrb_id"].astype(str)  # contributor ids to strings
+        c_df = c_df.sort_values(by="created")
+        c_df = c_df.reset_index(drop=True)
 
-    df["cntrb_id"] = df["cntrb_id"].astype(str)  # contributor ids to strings
-    df = df.sort_values(by="created")
-    df = df.reset_index()
-    df = df.reset_index(drop=True)
+        """
+        # change to compatible type and remove all data that has been incorrectly formated
+        c_df["created"] = pd.to_datetime(c_df["created"], utc=True)
+        c_df = c_df[c_df.created < pd.Timestamp(dt.date.today(), tz="UTC")].reset_index(drop=True)
+        return c_df
 
-    """
-    # change to compatible type and remove all data that has been incorrectly formated
-    df["created"] = pd.to_datetime(df["created"], utc=True).dt.date
-    df = df[df.created < dt.date.today()]
-
-    pic = []
-
-    for i, r in enumerate(repos):
-        # convert series to a dataframe
-        c_df = pd.DataFrame(df.loc[df["id"] == r]).reset_index(drop=True)
-
-        # bytes buffer to be written to
-        b = io.BytesIO()
-
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
-
-        # move head of buffer to the beginning
-        b.seek(0)
-
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
-
-    del df
-
-    # store results in Redis
+    # results arrive one repo at a time; a few repos are processed and written in the
+    # cache's (compressed) storage format in parallel while the next are read.
     cm_o = cm()
+    acks = []
+    frames = dbm.stream_query_by_repo(query_string, repos, params={"repo_ids": repos}, query_name=QUERY_NAME)
+    for r, blob in serialize_by_repo(frames, transform=process, sort_by="created"):
+        # 'ack' is a boolean of whether data was set correctly or not.
+        acks.append(cm_o.set(func=change_requests_query, repo=r, data=blob))
 
-    # 'ack' is a boolean of whether data was set correctly or not.
-    ack = cm_o.setm(
-        func=change_requests_query,
-        repos=repos,
-        datas=pic,
-    )
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
-
-    return ack
+    return all(acks)
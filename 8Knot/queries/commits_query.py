@@ -2,8 +2,8 @@ import logging
 from db_manager.augur_manager import AugurManager
 from app import celery_app
 import pandas as pd
-from cache_manager.cache_manager import CacheManager as cm
-import io
+import pyarrow as pa
+from cache_manager.cache_manager import CacheManager as cm, serialize_by_repo, deserialize
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -12,6 +12,36 @@ import os
 
 QUERY_NAME = "COMMITS"
 
+# types of the query's columns; results are extracted w/ COPY and parsed into them.
+COPY_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("commits", pa.string()),
+        ("author_email", pa.string()),
+        ("date", pa.string()),
+        ("author_timestamp", pa.timestamp("us", tz="UTC")),
+        ("committer_timestamp", pa.timestamp("us", tz="UTC")),
+        ("author_utc_offset", pa.int16()),
+        ("committer_utc_offset", pa.int16()),
+        ("collected", pa.timestamp("us")),
+    ]
+)
+
+# columns and types of the cached data. Repeated strings are dictionary-encoded,
+# ids are int32 and dates are date32, so the data is compact in Redis and in memory.
+# Timestamps are UTC; the offsets (minutes) give the local time they were recorded in.
+CACHE_SCHEMA = pa.schema(
+    [
+        ("commits", pa.string()),
+        ("author_email", pa.dictionary(pa.int32(), pa.string())),
+        ("date", pa.date32()),
+        ("author_timestamp", pa.timestamp("us", tz="UTC")),
+        ("committer_timestamp", pa.timestamp("us", tz="UTC")),
+        ("author_utc_offset", pa.int16()),
+        ("committer_utc_offset", pa.int16()),
+    ]
+)
+
 
 @celery_app.task(
     bind=True,
@@ -19,15 +49,22 @@ QUERY_NAME = "COMMITS"
     exponential_backoff=2,
     retry_kwargs={"max_retries": 5},
     retry_jitter=True,
+    slice_column="author_timestamp",
+    cache_schema=CACHE_SCHEMA,
 )
-def commits_query(self, repos):
+def commits_query(self, repos, window=None):
     """
     (Worker Query)
     Executes SQL query against Augur database for commit data.
 
+    Repos whose data is cached with a watermark only query the commits
+    collected since, which are appended to the cached data.
+
     Args:
     -----
         repo_ids ([str]): repos that SQL query is executed on.
+        window ([str | None, str | None] | None): time slice of a single, very large repo's
+            data to query. Set by 'CacheManager.dispatchm'.
 
     Returns:
     --------
@@ -38,12 +75,28 @@ def commits_query(self, repos):
     if len(repos) == 0:
         return None
 
+    cm_o = cm()
+
+    # repos that can be refreshed incrementally, and from when.
+    watermarks = dict(zip(repos, cm_o.get_watermarksm(func=commits_query, repos=repos)))
+    incremental = [r for r in repos if watermarks[r] is not None]
+    full = [r for r in repos if r not in incremental]
+
+    # only rows collected after the oldest watermark for incremental repos.
+    # rows some repos already have are dropped when merging.
+    params = {"repo_ids": repos}
+    delta_filter = ""
+    if incremental:
+        params["since"] = min((watermarks[r] for r in incremental), key=pd.Timestamp)
+        params["full_repo_ids"] = full
+        full_repos = "c.repo_id = ANY(:full_repo_ids) OR " if full else ""
+        delta_filter = f"AND ({full_repos}c.data_collection_date > :since)"
+
     # commenting-outunused query components. only need the repo_id and the
     # authorship date for our current queries. remove the '--' to re-add
     # the now-removed values.
     query_string = f"""
                     SELECT
-                        distinct
                         r.repo_id AS id,
                         -- r.repo_name,
                         c.cmt_commit_hash AS commits,
@@ -53,14 +106,30 @@ def commits_query(self, repos):
                         c.cmt_author_email AS author_email,
                         c.cmt_author_date AS date,
                         c.cmt_author_timestamp AS author_timestamp,
-                        c.cmt_committer_timestamp AS committer_timestamp
+                        c.cmt_committer_timestamp AS committer_timestamp,
+                        -- minutes the database's local time is ahead of UTC at each timestamp,
+                        -- as results are read in UTC.
+                        (EXTRACT(EPOCH FROM (c.cmt_author_timestamp AT TIME ZONE tz.name)
+                            - (c.cmt_author_timestamp AT TIME ZONE 'UTC')) / 60)::int AS author_utc_offset,
+                        (EXTRACT(EPOCH FROM (c.cmt_committer_timestamp AT TIME ZONE tz.name)
+                            - (c.cmt_committer_timestamp AT TIME ZONE 'UTC')) / 60)::int AS committer_utc_offset,
+                        -- one row per commit as with DISTINCT; a commit's files can be collected
+                        -- in different runs, so keep the latest run as its watermark.
+                        max(c.data_collection_date) AS collected
 
                     FROM
                         repo r
                     JOIN commits c
                         ON r.repo_id = c.repo_id
+                    CROSS JOIN
+                        (SELECT reset_val AS name FROM pg_settings WHERE name = 'TimeZone') tz
                     WHERE
-                        c.repo_id in ({str(repos)[1:-1]})
+                        c.repo_id = ANY(:repo_ids)
+                        {delta_filter}
+                    GROUP BY
+                        1, 2, 3, 4, 5, 6, 7, 8
+                    ORDER BY
+                        id
                     """
 
     try:
@@ -75,45 +144,59 @@ def commits_query(self, repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
+    # a slice of a very large repo, stitched together once all slices are set.
+    if window is not None:
+        query_string, params = dbm.window_query(query_string, self.slice_column, window, params)
 
-    # change to compatible type and remove all data that has been incorrectly formated
-    df["author_timestamp"] = pd.to_datetime(df["author_timestamp"], utc=True).dt.date
-    df = df[df.author_timestamp < dt.date.today()]
+    # commits dated today are dropped below, so the watermark can't pass
+    # the start of today or they'd never be queried again.
+    today = pd.Timestamp(dt.date.today())
 
-    # break apart returned data per repo
-    # and temporarily store in List to be
-    # stored in Redis.
-    pic = []
-    for r in repos:
-        # convert series to a dataframe
-        # once we've stored the data by ID we no longer need the column.
-        c_df = pd.DataFrame(df.loc[df["id"] == r].drop(columns=["id"])).reset_index(drop=True)
-
-        # bytes buffer to be written to
-        b = io.BytesIO()
-
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
-
-        # move head of buffer to the beginning
-        b.seek(0)
+    # how far each repo's data goes, set as its results are processed.
+    marks = {}
 
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
+    def process(r, c_df):
+        # change to compatible type and remove all data that has been incorrectly formated
+        c_df["date"] = pd.to_datetime(c_df["date"], utc=True, errors="coerce").dt.normalize()
+        c_df["author_timestamp"] = pd.to_datetime(c_df["author_timestamp"], utc=True)
+        c_df = c_df[c_df.author_timestamp < pd.Timestamp(dt.date.today(), tz="UTC")]
 
-    del df
-
-    # store results in Redis
-    cm_o = cm()
-
-    # 'ack' is a boolean of whether data was set correctly or not.
-    ack = cm_o.setm(
-        func=commits_query,
-        repos=repos,
-        datas=pic,
-    )
+        # once we've stored the data by ID we no longer need the column.
+        c_df = c_df.drop(columns=["id"])
+
+        # the latest collection run becomes the repo's watermark; it isn't cached with the rows.
+        collected = c_df.pop("collected")
+        marks[r] = str(min(collected.max(), today)) if len(collected) else watermarks[r]
+
+        if r in incremental:
+            cached = cm_o.get(func=commits_query, repo=r)
+            if cached is None:
+                # evicted since, so only the new rows are known. leave it missing to be fully queried.
+                return None
+            cached = deserialize(cached)
+            if list(cached.columns) != CACHE_SCHEMA.names:
+                # stored before its columns changed; left until it's next fully queried.
+                return None
+            c_df = pd.concat([cached, c_df]).drop_duplicates().reset_index(drop=True)
+
+        return c_df
+
+    # results arrive one repo at a time; a few repos are processed and written in the
+    # cache's (compressed) storage format in parallel while the next are read.
+    acks = []
+    frames = dbm.stream_query_by_repo(query_string, repos, schema=COPY_SCHEMA, params=params, query_name=QUERY_NAME)
+    for r, blob in serialize_by_repo(frames, transform=process, schema=CACHE_SCHEMA, sort_by="author_timestamp"):
+        if blob is None:
+            continue
+
+        # 'ack' is a boolean of whether data was set correctly or not.
+        acks.append(cm_o.set(func=commits_query, repo=r, data=blob, window=window))
+
+        # record how far the repo's data goes, for the next refresh.
+        # a slice's is kept until the repo's slices are stitched together.
+        cm_o.set_watermarksm(
+            func=commits_query, repos=[r], watermarks=[marks[r]], full=r not in incremental, window=window
+        )
 
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
-    return ack
+    return all(acks)
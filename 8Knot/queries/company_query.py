@@ -2,13 +2,41 @@ import logging
 from db_manager.augur_manager import AugurManager
 from app import celery_app
 import pandas as pd
-from cache_manager.cache_manager import CacheManager as cm
-import io
+import pyarrow as pa
+from cache_manager.cache_manager import CacheManager as cm, serialize_by_repo
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
 QUERY_NAME = "COMPANY"
 
+# types of the query's columns; results are extracted w/ COPY and parsed into them.
+COPY_SCHEMA = pa.schema(
+    [
+        ("cntrb_id", pa.string()),
+        ("created", pa.timestamp("us", tz="UTC")),
+        ("id", pa.int64()),
+        ("login", pa.string()),
+        ("action", pa.string()),
+        ("rank", pa.int64()),
+        ("cntrb_company", pa.string()),
+        ("email_list", pa.string()),
+    ]
+)
+
+# columns and types of the cached data. Repeated strings are dictionary-encoded,
+# ids are int32 and dates are date32, so the data is compact in Redis and in memory.
+CACHE_SCHEMA = pa.schema(
+    [
+        ("cntrb_id", pa.dictionary(pa.int32(), pa.string())),
+        ("created", pa.date32()),
+        ("login", pa.dictionary(pa.int32(), pa.string())),
+        ("action", pa.dictionary(pa.int32(), pa.string())),
+        ("rank", pa.int32()),
+        ("cntrb_company", pa.dictionary(pa.int32(), pa.string())),
+        ("email_list", pa.dictionary(pa.int32(), pa.string())),
+    ]
+)
+
 
 @celery_app.task(
     bind=True,
@@ -57,8 +85,9 @@ def company_query(self, repos):
                     JOIN contributors con
                         ON c.cntrb_id = con.cntrb_id
                     WHERE
-                        c.repo_id in({str(repos)[1:-1]})
+                        c.repo_id = ANY(:repo_ids)
                     GROUP BY c.cntrb_id, c.created_at, c.repo_id, c.login, c.action, c.rank, con.cntrb_company
+                    ORDER BY id
                     """
 
     try:
@@ -73,51 +102,27 @@ def company_query(self, repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
-
-    df["cntrb_id"] = df["cntrb_id"].astype(str)
-    df = df.sort_values(by="created")
-
-    # change to compatible type and remove all data that has been incorrectly formatted
-    df["created"] = pd.to_datetime(df["created"], utc=True).dt.date
-    df = df[df.created < dt.date.today()]
+    def process(r, c_df):
+        c_df["cntrb_id"] = c_df["cntrb_id"].astype(str)
 
-    df = df.reset_index()
-    df.drop("index", axis=1, inplace=True)
+        # change to compatible type and remove all data that has been incorrectly formatted
+        c_df["created"] = pd.to_datetime(c_df["created"], utc=True)
+        c_df = c_df[c_df.created < pd.Timestamp(dt.date.today(), tz="UTC")]
 
-    # break apart returned data per repo
-    # and temporarily store in List to be
-    # stored in Redis.
-    pic = []
-    for r in repos:
-        # convert series to a dataframe
         # once we've stored the data by ID we no longer need the column.
-        c_df = pd.DataFrame(df.loc[df["id"] == r].drop(columns=["id"])).reset_index(drop=True)
+        c_df = c_df.drop(columns=["id"]).reset_index(drop=True)
+        return c_df
 
-        # bytes buffer to be written to
-        b = io.BytesIO()
-
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
-
-        # move head of buffer to the beginning
-        b.seek(0)
-
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
-
-    del df
-
-    # store results in Redis
+    # results arrive one repo at a time; a few repos are processed and written in the
+    # cache's (compressed) storage format in parallel while the next are read.
     cm_o = cm()
-
-    # 'ack' is a boolean of whether data was set correctly or not.
-    ack = cm_o.setm(
-        func=company_query,
-        repos=repos,
-        datas=pic,
+    acks = []
+    frames = dbm.stream_query_by_repo(
+        query_string, repos, schema=COPY_SCHEMA, params={"repo_ids": repos}, query_name=QUERY_NAME
     )
+    for r, blob in serialize_by_repo(frames, transform=process, schema=CACHE_SCHEMA, sort_by="created"):
+        # 'ack' is a boolean of whether data was set correctly or not.
+        acks.append(cm_o.set(func=company_query, repo=r, data=blob))
 
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
-    return ack
+    return all(acks)
@@ -1,14 +1,42 @@
 import logging
 import pandas as pd
+import pyarrow as pa
 from db_manager.augur_manager import AugurManager
 from app import celery_app
-from cache_manager.cache_manager import CacheManager as cm
-import io
+from cache_manager.cache_manager import CacheManager as cm, serialize_by_repo
+from queries.action_taxonomy import label_actions
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
 QUERY_NAME = "CONTRIBUTOR"
 
+# types of the query's columns; results are extracted w/ COPY and parsed into them.
+COPY_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("repo_name", pa.string()),
+        ("cntrb_id", pa.string()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("login", pa.string()),
+        ("action", pa.string()),
+        ("rank", pa.int64()),
+    ]
+)
+
+# columns and types of the cached data. Repeated strings are dictionary-encoded,
+# ids are int32 and dates are date32, so the data is compact in Redis and in memory.
+CACHE_SCHEMA = pa.schema(
+    [
+        ("id", pa.int32()),
+        ("repo_name", pa.dictionary(pa.int32(), pa.string())),
+        ("cntrb_id", pa.dictionary(pa.int32(), pa.string())),
+        ("created_at", pa.date32()),
+        ("login", pa.dictionary(pa.int32(), pa.string())),
+        ("Action", pa.dictionary(pa.int32(), pa.string())),
+        ("rank", pa.int32()),
+    ]
+)
+
 
 @celery_app.task(
     bind=True,
@@ -16,8 +44,10 @@ QUERY_NAME = "CONTRIBUTOR"
     exponential_backoff=2,
     retry_kwargs={"max_retries": 5},
     retry_jitter=True,
+    slice_column="created_at",
+    cache_schema=CACHE_SCHEMA,
 )
-def contributors_query(self, repos):
+def contributors_query(self, repos, window=None):
     """
     (Worker Query)
     Executes SQL query against Augur database for contributor data.
@@ -29,6 +59,8 @@ def contributors_query(self, repos):
     Args:
     -----
         repo_ids ([str]): repos that SQL query is executed on.
+        window ([str | None, str | None] | None): time slice of a single, very large repo's
+            data to query. Set by 'CacheManager.dispatchm'.
 
     Returns:
     --------
@@ -40,6 +72,8 @@ def contributors_query(self, repos):
     if len(repos) == 0:
         return None
 
+    params = {"repo_ids": repos}
+
     query_string = f"""
                     SELECT
                         repo_id as id,
@@ -52,7 +86,9 @@ def contributors_query(self, repos):
                     FROM
                         augur_data.explorer_contributor_actions
                     WHERE
-                        repo_id in ({str(repos)[1:-1]})
+                        repo_id = ANY(:repo_ids)
+                    ORDER BY
+                        id
                 """
 
     try:
@@ -67,60 +103,30 @@ def contributors_query(self, repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
-
-    # update column values
-    df.loc[df["action"] == "pull_request_open", "action"] = "PR Opened"
-    df.loc[df["action"] == "pull_request_comment", "action"] = "PR Comment"
-    df.loc[df["action"] == "pull_request_closed", "action"] = "PR Closed"
-    df.loc[df["action"] == "pull_request_merged", "action"] = "PR Merged"
-    df.loc[df["action"] == "pull_request_review_COMMENTED", "action"] = "PR Review"
-    df.loc[df["action"] == "pull_request_review_APPROVED", "action"] = "PR Review"
-    df.loc[df["action"] == "pull_request_review_CHANGES_REQUESTED", "action"] = "PR Review"
-    df.loc[df["action"] == "pull_request_review_DISMISSED", "action"] = "PR Review"
-    df.loc[df["action"] == "issue_opened", "action"] = "Issue Opened"
-    df.loc[df["action"] == "issue_closed", "action"] = "Issue Closed"
-    df.loc[df["action"] == "issue_comment", "action"] = "Issue Comment"
-    df.loc[df["action"] == "commit", "action"] = "Commit"
-    df["cntrb_id"] = df["cntrb_id"].astype(str)  # contributor ids to strings
-    df.rename(columns={"action": "Action"}, inplace=True)
-
-    # change to compatible type and remove all data that has been incorrectly formated
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True).dt.date
-    df = df[df.created_at < dt.date.today()]
+    # a slice of a very large repo, stitched together once all slices are set.
+    if window is not None:
+        query_string, params = dbm.window_query(query_string, self.slice_column, window, params)
 
-    df = df.reset_index(drop=True)
+    def process(r, c_df):
+        # relabel actions w/ the shared taxonomy, one dictionary-encoded remap.
+        c_df["Action"] = label_actions(c_df.pop("action"))
+        c_df["cntrb_id"] = c_df["cntrb_id"].astype(str)  # contributor ids to strings
 
-    pic = []
+        # change to compatible type and remove all data that has been incorrectly formated
+        c_df["created_at"] = pd.to_datetime(c_df["created_at"], utc=True)
+        c_df = c_df[c_df.created_at < pd.Timestamp(dt.date.today(), tz="UTC")]
 
-    for i, r in enumerate(repos):
-        # convert series to a dataframe
-        c_df = pd.DataFrame(df.loc[df["id"] == r]).reset_index(drop=True)
+        c_df = c_df.reset_index(drop=True)
+        return c_df
 
-        # bytes buffer to be written to
-        b = io.BytesIO()
-
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
-
-        # move head of buffer to the beginning
-        b.seek(0)
-
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
-
-    del df
-
-    # store results in Redis
+    # results arrive one repo at a time; a few repos are processed and written in the
+    # cache's (compressed) storage format in parallel while the next are read.
     cm_o = cm()
+    acks = []
+    frames = dbm.stream_query_by_repo(query_string, repos, schema=COPY_SCHEMA, params=params, query_name=QUERY_NAME)
+    for r, blob in serialize_by_repo(frames, transform=process, schema=CACHE_SCHEMA, sort_by="created_at"):
+        # 'ack' is a boolean of whether data was set correctly or not.
+        acks.append(cm_o.set(func=contributors_query, repo=r, data=blob, window=window))
 
-    # 'ack' is a boolean of whether data was set correctly or not.
-    ack = cm_o.setm(
-        func=contributors_query,
-        repos=repos,
-        datas=pic,
-    )
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
-
-    return ack
+    return all(acks)
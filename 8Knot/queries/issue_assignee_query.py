@@ -1,14 +1,28 @@
 import logging
 import pandas as pd
+import pyarrow as pa
 from db_manager.augur_manager import AugurManager
 from app import celery_app
-from cache_manager.cache_manager import CacheManager as cm
-import io
+from cache_manager.cache_manager import CacheManager as cm, serialize_by_repo
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
 QUERY_NAME = "ISSUE_ASSIGNEE"
 
+# columns and types of the cached data. Repeated strings are dictionary-encoded,
+# ids are int32 and dates are date32, so the data is compact in Redis and in memory.
+CACHE_SCHEMA = pa.schema(
+    [
+        ("issue_id", pa.int64()),
+        ("id", pa.int32()),
+        ("created", pa.date32()),
+        ("closed", pa.timestamp("us", tz="UTC")),
+        ("assign_date", pa.timestamp("us", tz="UTC")),
+        ("assignment_action", pa.dictionary(pa.int32(), pa.string())),
+        ("assignee", pa.dictionary(pa.int32(), pa.string())),
+    ]
+)
+
 
 @celery_app.task(
     bind=True,
@@ -44,7 +58,9 @@ def issue_assignee_query(self, repos):
                     FROM
                         explorer_issue_assignments ia
                     WHERE
-                        ia.id in ({str(repos)[1:-1]})
+                        ia.id = ANY(:repo_ids)
+                    ORDER BY
+                        ia.id
                 """
 
     try:
@@ -59,46 +75,24 @@ def issue_assignee_query(self, repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
-
-    # id as string and slice to remove excess 0s
-    df["assignee"] = df["assignee"].astype(str)
-    df["assignee"] = df["assignee"].str[:13]
-
-    # change to compatible type and remove all data that has been incorrectly formated
-    df["created"] = pd.to_datetime(df["created"], utc=True).dt.date
-    df = df[df.created < dt.date.today()]
-
-    pic = []
-
-    for i, r in enumerate(repos):
-        # convert series to a dataframe
-        c_df = pd.DataFrame(df.loc[df["id"] == r]).reset_index(drop=True)
+    def process(r, c_df):
+        # id as string and slice to remove excess 0s
+        c_df["assignee"] = c_df["assignee"].astype(str)
+        c_df["assignee"] = c_df["assignee"].str[:13]
 
-        # bytes buffer to be written to
-        b = io.BytesIO()
+        # change to compatible type and remove all data that has been incorrectly formated
+        c_df["created"] = pd.to_datetime(c_df["created"], utc=True)
+        c_df = c_df[c_df.created < pd.Timestamp(dt.date.today(), tz="UTC")].reset_index(drop=True)
+        return c_df
 
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
-
-        # move head of buffer to the beginning
-        b.seek(0)
-
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
-
-    del df
-
-    # store results in Redis
+    # results arrive one repo at a time; a few repos are processed and written in the
+    # cache's (compressed) storage format in parallel while the next are read.
     cm_o = cm()
+    acks = []
+    frames = dbm.stream_query_by_repo(query_string, repos, params={"repo_ids": repos}, query_name=QUERY_NAME)
+    for r, blob in serialize_by_repo(frames, transform=process, schema=CACHE_SCHEMA, sort_by="created"):
+        # 'ack' is a boolean of whether data was set correctly or not.
+        acks.append(cm_o.set(func=issue_assignee_query, repo=r, data=blob))
 
-    # 'ack' is a boolean of whether data was set correctly or not.
-    ack = cm_o.setm(
-        func=issue_assignee_query,
-        repos=repos,
-        datas=pic,
-    )
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
-
-    return ack
+    return all(acks)
@@ -1,14 +1,28 @@
 import logging
 from db_manager.augur_manager import AugurManager
 from app import celery_app
-from cache_manager.cache_manager import CacheManager as cm
+from cache_manager.cache_manager import CacheManager as cm, serialize_by_repo
 import pandas as pd
-import io
+import pyarrow as pa
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
 QUERY_NAME = "ISSUE"
 
+# columns and types of the cached data. Repeated strings are dictionary-encoded,
+# ids are int32 and dates are date32, so the data is compact in Redis and in memory.
+CACHE_SCHEMA = pa.schema(
+    [
+        ("id", pa.int32()),
+        ("repo_name", pa.dictionary(pa.int32(), pa.string())),
+        ("issue", pa.int64()),
+        ("issue_number", pa.int32()),
+        ("gh_issue", pa.int64()),
+        ("created", pa.date32()),
+        ("closed", pa.timestamp("us", tz="UTC")),
+    ]
+)
+
 
 @celery_app.task(
     bind=True,
@@ -16,8 +30,10 @@ QUERY_NAME = "ISSUE"
     exponential_backoff=2,
     retry_kwargs={"max_retries": 5},
     retry_jitter=True,
+    slice_column="created",
+    cache_schema=CACHE_SCHEMA,
 )
-def issues_query(self, repos):
+def issues_query(self, repos, window=None):
     """
     (Worker Query)
     Executes SQL query against Augur database for issue data.
@@ -25,6 +41,8 @@ def issues_query(self, repos):
     Args:
     -----
         repo_ids ([str]): repos that SQL query is executed on.
+        window ([str | None, str | None] | None): time slice of a single, very large repo's
+            data to query. Set by 'CacheManager.dispatchm'.
 
     Returns:
     --------
@@ -36,6 +54,8 @@ def issues_query(self, repos):
     if len(repos) == 0:
         return None
 
+    params = {"repo_ids": repos}
+
     query_string = f"""
                     SELECT
                         r.repo_id as id,
@@ -51,7 +71,9 @@ def issues_query(self, repos):
                         issues i
                     WHERE
                         r.repo_id = i.repo_id AND
-                        r.repo_id in ({str(repos)[1:-1]})
+                        r.repo_id = ANY(:repo_ids)
+                    ORDER BY
+                        id
                     """
 
     try:
@@ -66,51 +88,29 @@ def issues_query(self, repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
-
-    df = df[df["pull_request_id"].isnull()]
-    df = df.drop(columns="pull_request_id")
-    df = df.sort_values(by="created")
-
-    # change to compatible type and remove all data that has been incorrectly formated
-    df["created"] = pd.to_datetime(df["created"], utc=True).dt.date
-    df = df[df.created < dt.date.today()]
+    # a slice of a very large repo, stitched together once all slices are set.
+    if window is not None:
+        query_string, params = dbm.window_query(query_string, self.slice_column, window, params)
 
-    df = df.reset_index()
-    df.drop("index", axis=1, inplace=True)
+    def process(r, c_df):
+        c_df = c_df[c_df["pull_request_id"].isnull()]
+        c_df = c_df.drop(columns="pull_request_id")
 
-    # break apart returned data per repo
-    # and temporarily store in List to be
-    # stored in Redis.
-    pic = []
-    for i, r in enumerate(repos):
-        # convert series to a dataframe
-        c_df = pd.DataFrame(df.loc[df["id"] == r]).reset_index(drop=True)
+        # change to compatible type and remove all data that has been incorrectly formated
+        c_df["created"] = pd.to_datetime(c_df["created"], utc=True)
+        c_df = c_df[c_df.created < pd.Timestamp(dt.date.today(), tz="UTC")]
 
-        # bytes buffer to be written to
-        b = io.BytesIO()
+        c_df = c_df.reset_index(drop=True)
+        return c_df
 
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
-
-        # move head of buffer to the beginning
-        b.seek(0)
-
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
-
-    del df
-
-    # store results in Redis
+    # results arrive one repo at a time; a few repos are processed and written in the
+    # cache's (compressed) storage format in parallel while the next are read.
     cm_o = cm()
-
-    # 'ack' is a boolean of whether data was set correctly or not.
-    ack = cm_o.setm(
-        func=issues_query,
-        repos=repos,
-        datas=pic,
-    )
+    acks = []
+    frames = dbm.stream_query_by_repo(query_string, repos, params=params, query_name=QUERY_NAME)
+    for r, blob in serialize_by_repo(frames, transform=process, schema=CACHE_SCHEMA, sort_by="created"):
+        # 'ack' is a boolean of whether data was set correctly or not.
+        acks.append(cm_o.set(func=issues_query, repo=r, data=blob, window=window))
 
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
-    return ack
+    return all(acks)
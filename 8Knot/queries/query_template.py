@@ -1,9 +1,9 @@
 import logging
 import pandas as pd
+import pyarrow as pa
 from db_manager.augur_manager import AugurManager
 from app import celery_app
-from cache_manager.cache_manager import CacheManager as cm
-import io
+from cache_manager.cache_manager import CacheManager as cm, serialize_by_repo
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -15,12 +15,22 @@ TODO:
 (3) paste SQL query in the query_string
 (4) insert any necessary df column name or format changed under the pandas column and format updates comment
 (5) reset df index if #4 is performed via "df = df.reset_index(drop=True)"
-(6) go to index/index_callbacks.py and import the NAME_query as a unqiue acronym and add it to the QUERIES list
-(7) delete this list when completed
+(6) declare every column the query stores, and its type, in CACHE_SCHEMA
+(7) go to index/index_callbacks.py and import the NAME_query as a unqiue acronym and add it to the QUERIES list
+(8) delete this list when completed
 """
 
 QUERY_NAME = "NAME"
 
+# columns and types of the cached data. Repeated strings are dictionary-encoded,
+# ids are int32 and dates are date32, so the data is compact in Redis and in memory.
+CACHE_SCHEMA = pa.schema(
+    [
+        ("id", pa.int32()),
+        ("created", pa.date32()),
+    ]
+)
+
 
 @celery_app.task(
     bind=True,
@@ -53,7 +63,9 @@ def NAME_query(self, repos):
                     FROM
 
                     WHERE
-                        repo_id in ({str(repos)[1:-1]})
+                        repo_id = ANY(:repo_ids)
+                    ORDER BY
+                        id
                 """
 
     try:
@@ -68,51 +80,28 @@ def NAME_query(self, repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
-
-    # pandas column and format updates
-    """Commonly used df updates:
-
-    df["cntrb_id"] = df["cntrb_id"].astype(str)  # contributor ids to strings
-    df = df.sort_values(by="created")
-    df = df.reset_index()
-    df = df.reset_index(drop=True)
-
-    """
-    # change to compatible type and remove all data that has been incorrectly formated
-    df["created"] = pd.to_datetime(df["created"], utc=True).dt.date
-    df = df[df.created < dt.date.today()]
-
-    pic = []
-
-    for i, r in enumerate(repos):
-        # convert series to a dataframe
-        c_df = pd.DataFrame(df.loc[df["id"] == r]).reset_index(drop=True)
-
-        # bytes buffer to be written to
-        b = io.BytesIO()
+    def process(r, c_df):
+        # pandas column and format updates
+        """Commonly used df updates:
 
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
+        c_df["cntrb_id"] = c_df["cntrb_id"].astype(str)  # contributor ids to strings
+        c_df = c_df.sort_values(by="created")
+        c_df = c_df.reset_index(drop=True)
 
-        # move head of buffer to the beginning
-        b.seek(0)
+        """
+        # change to compatible type and remove all data that has been incorrectly formated
+        c_df["created"] = pd.to_datetime(c_df["created"], utc=True)
+        c_df = c_df[c_df.created < pd.Timestamp(dt.date.today(), tz="UTC")].reset_index(drop=True)
+        return c_df
 
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
-
-    del df
-
-    # store results in Redis
+    # results arrive one repo at a time; a few repos are processed and written in the
+    # cache's (compressed) storage format in parallel while the next are read.
     cm_o = cm()
+    acks = []
+    frames = dbm.stream_query_by_repo(query_string, repos, params={"repo_ids": repos}, query_name=QUERY_NAME)
+    for r, blob in serialize_by_repo(frames, transform=process, schema=CACHE_SCHEMA, sort_by="created"):
+        # 'ack' is a boolean of whether data was set correctly or not.
+        acks.append(cm_o.set(func=NAME_query, repo=r, data=blob))
 
-    # 'ack' is a boolean of whether data was set correctly or not.
-    ack = cm_o.setm(
-        func=NAME_query,
-        repos=repos,
-        datas=pic,
-    )
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
-
-    return ack
+    return all(acks)
@@ -0,0 +1,45 @@
+import logging
+from app import celery_app
+from cache_manager.cache_manager import CacheManager as cm
+
+QUERY_NAME = "STITCH_SLICES"
+
+
+@celery_app.task(
+    bind=True,
+    autoretry_for=(Exception,),
+    exponential_backoff=2,
+    retry_kwargs={"max_retries": 5},
+    retry_jitter=True,
+)
+def stitch_slices(self, repos, query, windows):
+    """
+    (Worker Query)
+    Combines the time slices of a repo's data once the query
+    tasks for all of its windows have set them.
+
+    Runs as the callback of the chord that 'CacheManager.dispatchm'
+    enqueues for very large repos, and owns the repo meanwhile.
+
+    Args:
+    -----
+        repos ([int]): the repo that was sliced.
+        query (str): name of the query (Celery task) that set the slices.
+        windows ([[str | None, str | None]]): the repo's slices.
+
+    Returns:
+    --------
+        bool: Success of combining the slices
+    """
+    logging.warning(f"{QUERY_NAME}_DATA_QUERY - START")
+
+    func = celery_app.tasks[query]
+
+    cm_o = cm()
+    acks = [cm_o.stitch_slicesm(func=func, repo=r, windows=windows) for r in repos]
+
+    # waiting callbacks are watching this task, not the query tasks.
+    cm_o.releasem(func=func, repos=repos, task_id=self.request.id)
+
+    logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
+    return all(acks)
@@ -2,6 +2,7 @@ import logging
 from app import celery_app, augur
 import pandas as pd
 from cache_manager.cache_manager import CacheManager as cm
+from cache_manager.redis_pools import users_client
 import io
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
@@ -32,21 +33,15 @@ def user_groups_query(self, user_id):
     """
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - START")
 
-    users_cache = redis.StrictRedis(
-        host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-        port=6379,
-        password=os.getenv("REDIS_PASSWORD", ""),
-    )
-
-    # checks connection to Redis, raises redis.exceptions.ConnectionError if connection fails.
-    # returns True if connection succeeds.
-    users_cache.ping()
+    # raises redis.exceptions.ConnectionError if connection fails.
+    users_cache = users_client()
 
     # check if user is in sessions
-    if not users_cache.exists(user_id):
+    user = users_cache.get(user_id)
+    if user is None:
         raise Exception("Expected user data under user_id not in cache.")
     else:
-        user = json.loads(users_cache.get(user_id))
+        user = json.loads(user)
 
     # query groups and options from Augur
     users_groups, users_options = get_user_groups(user["username"], user["access_token"])
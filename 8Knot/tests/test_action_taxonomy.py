@@ -0,0 +1,69 @@
+import ast
+import pathlib
+
+import pandas as pd
+
+import queries.action_taxonomy as at
+
+PAGES = pathlib.Path(__file__).resolve().parent.parent / "pages"
+
+
+def action_value(node):
+    """Value of an option: an action constant (at.X) or a literal. None otherwise."""
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "at":
+        return getattr(at, node.attr)
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def dropdown_values():
+    """Option values and defaults of the pages' dropdowns of actions, i.e.
+    the dropdowns w/ an action constant among their options."""
+    values = set()
+    for path in PAGES.rglob("*.py"):
+        for node in ast.walk(ast.parse(path.read_text())):
+            if not isinstance(node, ast.Call):
+                continue
+            keywords = {k.arg: k.value for k in node.keywords}
+            options = keywords.get("options")
+            if not isinstance(options, ast.List):
+                continue
+
+            options = [
+                v
+                for o in options.elts
+                if isinstance(o, ast.Dict)
+                for k, v in zip(o.keys, o.values)
+                if isinstance(k, ast.Constant) and k.value == "value"
+            ]
+            if "value" in keywords:
+                options.append(keywords["value"])
+            if not any(isinstance(o, ast.Attribute) for o in options):
+                continue
+
+            values.update(action_value(o) for o in options)
+    return values
+
+
+def test_dropdown_values_match_labels():
+    labels = pd.Series(at.label_actions(pd.Series(list(at.ACTION_LABELS))).categories)
+
+    values = dropdown_values()
+    assert values, "no dropdowns of actions found"
+    assert None not in values
+
+    # the pages filter the 'Action' column w/ str.contains, e.g. "Comment" for every kind of comment.
+    unmatched = [v for v in values if not labels.str.contains(v, regex=False).any()]
+    assert not unmatched
+
+
+def test_label_actions():
+    actions = pd.Series(["commit", "pull_request_review_APPROVED", None, "pull_request_review_DISMISSED", "other"])
+
+    labels = at.label_actions(actions)
+
+    assert list(labels.categories) == [at.COMMIT, at.PR_REVIEW, "other"]
+    assert labels.tolist()[:2] == [at.COMMIT, at.PR_REVIEW]
+    assert pd.isna(labels[2])
+    assert labels.tolist()[3:] == [at.PR_REVIEW, "other"]
@@ -0,0 +1,72 @@
+import fakeredis
+import pandas as pd
+import pyarrow as pa
+import pytest
+from celery import Celery
+
+import cache_manager.cache_manager as cache_manager
+from cache_manager.cache_manager import CacheManager, STITCH_TASK, plan_windows, serialize, deserialize
+
+SCHEMA = pa.schema([("created", pa.timestamp("us", tz="UTC")), ("n", pa.int32())])
+
+
+@pytest.fixture
+def cm(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        cache_manager, "cache_client", lambda decode_responses=False: fakeredis.FakeStrictRedis(server=server)
+    )
+    return CacheManager()
+
+
+@pytest.fixture
+def app():
+    app = Celery("test", broker="memory://", backend="cache+memory://")
+    app.conf.task_always_eager = True
+    return app
+
+
+def test_sliced_repo_is_stitched_from_its_windows(cm, app, monkeypatch):
+    queried, stitched = [], []
+
+    @app.task(bind=True, slice_column="created", cache_schema=SCHEMA)
+    def sliced_query(self, repos, window=None):
+        queried.append(window)
+        return True
+
+    @app.task(name=STITCH_TASK)
+    def stitch_slices(repos, query, windows):
+        stitched.append((repos, query, windows))
+        return True
+
+    monkeypatch.setattr(cm, "estimatesm", lambda func, repos: [cache_manager.SLICE_MIN_BYTES + 1] * len(repos))
+
+    assert cm._launchm(func=sliced_query, repos=[1], sliced=True) == [1]
+
+    # the header queries every window; the body gets its own arguments, not the header's results.
+    assert queried == plan_windows()
+    assert stitched == [([1], sliced_query.name, plan_windows())]
+
+
+def test_stitch_keeps_oldest_slice_watermark(cm, app):
+    @app.task(slice_column="created", cache_schema=SCHEMA)
+    def sliced_query(repos, window=None):
+        return True
+
+    windows = [[None, "2022-01-01"], ["2022-01-01", None]]
+    rows = [["2021-06-01", "2021-07-01"], ["2022-02-01"]]
+    marks = ["2023-01-02 00:00:00", "2023-01-01 00:00:00"]
+
+    for w, r, m in zip(windows, rows, marks):
+        table = pa.Table.from_pandas(
+            pd.DataFrame({"created": pd.to_datetime(r, utc=True), "n": 1}), schema=SCHEMA, preserve_index=False
+        )
+        cm.set(func=sliced_query, repo=1, data=serialize(table, sort_by="created"), window=w)
+        cm.set_watermarksm(func=sliced_query, repos=[1], watermarks=[m], full=True, window=w)
+
+    assert cm.stitch_slicesm(func=sliced_query, repo=1, windows=windows)
+
+    df = deserialize(cm.get(func=sliced_query, repo=1))
+    assert len(df) == 3
+    assert df["created"].is_monotonic_increasing
+    assert cm.get_watermarksm(func=sliced_query, repos=[1]) == ["2023-01-01 00:00:00"]
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pages.utils.time_utils import sort_by_date, filter_by_date, count_open, count_new_staling_stale
+
+
+def get_open(df, date):
+    """Open items at 'date', counted by filtering, as the visualizations did before 'count_open'."""
+    df_created = df[df["created"] <= date]
+    return len(df_created[df_created["closed"] > date]) + len(df_created[df_created["closed"].isnull()])
+
+
+def get_new_staling_stale(df, date, staling_interval, stale_interval):
+    """New, staling and stale items at 'date', counted by filtering, as before 'count_new_staling_stale'."""
+    df_created = df[df["created"] <= date]
+    df_open = pd.concat([df_created[df_created["closed"] > date], df_created[df_created["closed"].isnull()]])
+
+    staling_days = date - pd.Timedelta(days=staling_interval)
+    stale_days = date - pd.Timedelta(days=stale_interval)
+
+    num_new = len(df_open[df_open["created"] >= staling_days])
+    staling = df_open[df_open["created"] > stale_days]
+    num_staling = len(staling[staling["created"] < staling_days])
+
+    return [num_new, num_staling, len(df_open) - num_new - num_staling]
+
+
+def random_items(seed, n=300):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2020-01-01", tz="UTC")
+
+    # whole days, so items are created and closed exactly on the dates and at the bounds
+    created = start + pd.to_timedelta(rng.integers(0, 400, n), unit="D")
+    closed = created + pd.to_timedelta(rng.integers(0, 200, n), unit="D")
+    df = pd.DataFrame({"created": created, "closed": closed})
+
+    df.loc[rng.random(n) < 0.2, "closed"] = pd.NaT
+    df.loc[rng.random(n) < 0.05, "created"] = pd.NaT
+    return df
+
+
+DATES = pd.date_range("2019-12-01", "2021-06-01", freq="D", tz="UTC")
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_count_open_matches_filtering(seed):
+    df = random_items(seed)
+
+    expected = [get_open(df, d) for d in DATES]
+
+    assert count_open(df["created"], df["closed"], DATES).tolist() == expected
+
+
+@pytest.mark.parametrize("staling, stale", [(7, 30), (30, 90), (10, 10), (30, 7)])
+def test_count_new_staling_stale_matches_filtering(staling, stale):
+    df = random_items(staling + stale)
+
+    expected = np.array([get_new_staling_stale(df, d, staling, stale) for d in DATES]).T
+    counts = count_new_staling_stale(df["created"], df["closed"], DATES, staling, stale)
+
+    for name, c, e in zip(["new", "staling", "stale"], counts, expected):
+        assert c.tolist() == e.tolist(), name
+
+
+def test_count_open_min_age_bound():
+    created = pd.Series(pd.to_datetime(["2021-01-01"], utc=True))
+    closed = pd.Series(pd.to_datetime([None], utc=True))
+    dates = pd.date_range("2021-01-09", "2021-01-12", freq="D", tz="UTC")
+
+    # exactly 10 days old on 2021-01-11
+    inclusive = count_open(created, closed, dates, min_age=pd.Timedelta(days=10))
+    exclusive = count_open(created, closed, dates, min_age=pd.Timedelta(days=10), inclusive=False)
+
+    assert inclusive.tolist() == [0, 0, 1, 1]
+    assert exclusive.tolist() == [0, 0, 0, 1]
+
+
+def test_count_open_nulls():
+    created = pd.Series(pd.to_datetime(["2021-01-01", None, "2021-01-02"], utc=True))
+    closed = pd.Series(pd.to_datetime([None, "2021-01-03", "2021-01-03"], utc=True))
+    dates = pd.date_range("2020-12-31", "2021-01-04", freq="D", tz="UTC")
+
+    # never created: not counted. never closed: open from then on.
+    assert count_open(created, closed, dates).tolist() == [0, 1, 2, 1, 1]
+
+
+def test_count_open_closed_before_min_age():
+    created = pd.Series(pd.to_datetime(["2021-01-01", "2021-01-01"], utc=True))
+    closed = pd.Series(pd.to_datetime(["2021-01-05", "2021-01-20"], utc=True))
+    dates = pd.date_range("2021-01-01", "2021-01-25", freq="D", tz="UTC")
+
+    # the first is closed before it's 10 days old, so it never counts
+    counts = count_open(created, closed, dates, min_age=pd.Timedelta(days=10))
+
+    assert counts.tolist() == [0] * 10 + [1] * 9 + [0] * 6
+
+
+def test_count_new_staling_stale_without_staling_bucket():
+    created = pd.Series(pd.to_datetime(["2021-01-01", "2021-01-08", "2021-01-10"], utc=True))
+    closed = pd.Series(pd.to_datetime([None, None, None], utc=True))
+    dates = pd.DatetimeIndex(["2021-01-10"], tz="UTC")
+
+    # w/ stale_days <= staling_days nothing is staling; older items are stale
+    new, staling, stale = count_new_staling_stale(created, closed, dates, staling_days=5, stale_days=3)
+
+    assert (new.tolist(), staling.tolist(), stale.tolist()) == ([2], [0], [1])
+
+
+def dated_items(seed, tz="UTC", n=500):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2020-01-01", tz=tz)
+
+    # several rows per day, and rows exactly at midnight, i.e. on the bounds
+    created = start + pd.to_timedelta(rng.integers(0, 365 * 24, n), unit="h")
+    df = pd.DataFrame({"created": created, "id": np.arange(n)})
+    df.loc[rng.random(n) < 0.1, "created"] = pd.NaT
+    return df
+
+
+BOUNDS = [
+    ("2020-03-01", "2020-06-30"),
+    ("2020-03-01", None),
+    (None, "2020-06-30"),
+    ("2019-01-01", "2019-12-31"),
+    ("2020-06-30", "2020-03-01"),
+]
+
+
+@pytest.mark.parametrize("tz", ["UTC", None])
+@pytest.mark.parametrize("start, end", BOUNDS)
+def test_filter_by_date_search_matches_mask(tz, start, end):
+    df = sort_by_date(dated_items(0, tz=tz), "created")
+    assert df.attrs["sorted_by"] == "created"
+    assert df["created"].isna().iloc[: df["created"].isna().sum()].all()
+
+    # same rows, w/o the flag, so they're compared w/ a boolean mask
+    unsorted = df.copy()
+    unsorted.attrs = {}
+
+    searched = filter_by_date(df, "created", start, end)
+    masked = filter_by_date(unsorted, "created", start, end)
+
+    assert searched["id"].tolist() == masked["id"].tolist()
+
+
+@pytest.mark.parametrize(
+    "start, end",
+    [
+        (pd.Timestamp("2020-03-01 05:00", tz="America/New_York"), pd.Timestamp("2020-06-30 20:00", tz="Asia/Tokyo")),
+        (pd.Timestamp("2020-03-01", tz="UTC"), None),
+    ],
+)
+def test_filter_by_date_search_matches_mask_tz_bounds(start, end):
+    df = sort_by_date(dated_items(1), "created")
+
+    unsorted = df.copy()
+    unsorted.attrs = {}
+
+    searched = filter_by_date(df, "created", start, end)
+    masked = filter_by_date(unsorted, "created", start, end)
+
+    assert len(searched) > 0
+    assert searched["id"].tolist() == masked["id"].tolist()
+
+
+def test_sort_by_date_keeps_sorted_data():
+    df = sort_by_date(dated_items(2), "created")
+
+    assert sort_by_date(df, "created") is df